@@ -0,0 +1,377 @@
+import argparse
+import itertools
+import json
+import os
+import re
+import resource
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+import process
+from process import readAlchemistCsv, extractCoordinates, extractVariableNames
+
+HEADER_RULE = '#' * 69
+
+def legacyOpenCsv(path):
+    """
+    The original line-by-line reader, kept as the reference for benchmarks.
+
+    Parameters
+    ----------
+    path : str
+        path to the target file
+
+    Returns
+    -------
+    list of list
+        A matrix with the values of the csv file
+
+    """
+    regex = re.compile(r'\d')
+    with open(path, 'r') as file:
+        lines = filter(lambda x: regex.match(x[0]), file.readlines())
+        return [[float(x) for x in line.split()] for line in lines]
+
+def legacyRead(path):
+    return np.matrix(legacyOpenCsv(path)), extractCoordinates(path), extractVariableNames(path)
+
+def writeAlchemistExport(path, variables, columns, data):
+    """
+    Writes a file in the format of the Alchemist exports: a banner, the
+    line with the simulation variables, the line with the column names, the
+    data (with the first row repeated, as Alchemist does at the first
+    step), and the closing banner.
+
+    Parameters
+    ----------
+    path : str
+        path to the target file, compressed if its suffix is in
+        process.exportCodecs
+    variables : dict
+        the simulation variables, by name
+    columns : list of str
+        the column names
+    data : ndarray
+        the (rows x columns) matrix of values
+
+    """
+    stamp = '2024-06-03T16:00+0000'
+    body = '\n'.join(map(' '.join, np.concatenate([data[:1], data]).astype(float).astype(str).tolist()))
+    with process.openExport(path, 'wt') as file:
+        file.write(f'{HEADER_RULE}\n# Alchemist log file - simulation started at: {stamp} #\n{HEADER_RULE}\n#\n')
+        file.write('# ' + ', '.join(f'{name} = {value}' for name, value in variables.items()) + '\n#\n')
+        file.write('# The columns have the following meaning: \n# ' + ' '.join(columns) + ' \n')
+        file.write(body + '\n')
+        file.write(f'{HEADER_RULE}\n# End of data export. Simulation finished at: {stamp} #\n{HEADER_RULE}\n')
+
+def generateDataset(directory, experiment='1-exported-data', sweep=None, seeds=10, rows=1500, columns=('time', 'error'), suffix='.csv'):
+    """
+    Generates a synthetic sweep of Alchemist exports, one file per
+    combination of the sweep values and seed. Data is a reproducible random
+    walk for every column but time, which advances by one per row.
+
+    Parameters
+    ----------
+    directory : str
+        where to write the files
+    experiment : str
+        the experiment prefix of the file names
+    sweep : dict
+        the values of each simulation variable, by name
+    seeds : int
+        number of seeds per combination
+    rows : int
+        number of time instants per run
+    columns : tuple of str
+        the column names, the first being the time
+    suffix : str
+        the file suffix, one of process.exportCodecs
+
+    Returns
+    -------
+    int
+        the number of files written
+
+    """
+    sweep = sweep or {'agentFrequency': [1.0, 2.0], 'speed': [1.0], 'variance': [0.0, 0.5], 'numberOfDrones': [16]}
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    count = 0
+    for values in itertools.product(*sweep.values(), range(seeds)):
+        variables = dict(zip(list(sweep) + ['seed'], values[:-1] + (float(values[-1]),)))
+        generator = np.random.default_rng(count)
+        data = np.empty((rows, len(columns)))
+        data[:, 0] = np.arange(rows, dtype=float)
+        data[:, 1:] = 1000 + np.cumsum(generator.normal(0, 20, (rows, len(columns) - 1)), axis=0)
+        name = experiment + '_' + '_'.join(f'{key}-{value}' for key, value in variables.items()) + suffix
+        writeAlchemistExport(f'{directory}/{name}', variables, columns, data)
+        count += 1
+    return count
+
+def timeReader(reader, files, repeat):
+    """
+    Measures the best wall-clock time to read all the files with a reader.
+
+    Parameters
+    ----------
+    reader : callable
+        function taking a file path
+    files : list of str
+        the files to read
+    repeat : int
+        how many times to repeat the measure
+
+    Returns
+    -------
+    float
+        the best elapsed time, in seconds
+
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for file in files:
+            reader(file)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmarkReaders(files, repeat=3):
+    """
+    Compares the throughput of readAlchemistCsv against the legacy reader.
+
+    Parameters
+    ----------
+    files : list of str
+        the files to read
+    repeat : int
+        how many times to repeat each measure
+
+    Returns
+    -------
+    dict
+        elapsed seconds per reader name
+
+    """
+    megabytes = sum(os.path.getsize(file) for file in files) / 2**20
+    results = {}
+    for name, reader in [('legacy', legacyRead), ('readAlchemistCsv', readAlchemistCsv)]:
+        elapsed = timeReader(reader, files, repeat)
+        results[name] = elapsed
+        print(f'{name:>18}: {elapsed:8.3f}s {len(files) / elapsed:10.1f} files/s {megabytes / elapsed:8.1f} MB/s')
+    print(f'{"speedup":>18}: {results["legacy"] / results["readAlchemistCsv"]:8.2f}x')
+    return results
+
+class PhaseTimer:
+    """
+    Collects elapsed time, throughput and peak traced memory of the phases
+    of a benchmark.
+
+    Parameters
+    ----------
+    traceMemory : bool
+        whether to measure the peak memory allocated in each phase
+    """
+    def __init__(self, traceMemory=True):
+        self.traceMemory = traceMemory
+        self.results = {}
+
+    def measure(self, name, function, files=0, rows=0):
+        """
+        Runs a phase and records its measures.
+
+        Parameters
+        ----------
+        name : str
+            the name of the phase
+        function : callable
+            the phase, without arguments
+        files : int
+            number of files processed by the phase
+        rows : int
+            number of rows processed by the phase
+
+        Returns
+        -------
+        object
+            what the phase returned
+        """
+        if self.traceMemory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        peak = None
+        if self.traceMemory:
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        self.results[name] = {
+            'seconds': elapsed,
+            'files_per_second': files / elapsed if files and elapsed else None,
+            'rows_per_second': rows / elapsed if rows and elapsed else None,
+            'peak_mb': peak,
+        }
+        return result
+
+def benchmarkPhases(directory, timeSamples=100, minTime=0, maxTime=1500, seedVars=('seed',), charts=8, traceMemory=True):
+    """
+    Times each phase of the processing of a data directory separately.
+
+    Parameters
+    ----------
+    directory : str
+        where to find Alchemist data files
+    timeSamples : int
+        number of time samples
+    minTime : float
+        first time sample
+    maxTime : float
+        last time sample
+    seedVars : tuple of str
+        the variables aggregated over
+    charts : int
+        maximum number of charts rendered per experiment
+    traceMemory : bool
+        whether to measure the peak memory of each phase
+
+    Returns
+    -------
+    dict
+        the measures of each phase, by name
+
+    """
+    # process imports these lazily: import them before timing, so that no phase includes the import
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot
+    import xarray
+    timer = PhaseTimer(traceMemory)
+    timeline = np.linspace(minTime, maxTime, timeSamples)
+    index = process.CoordinateIndex(directory)
+    timer.measure('coordinates', index.refresh, files=len(os.listdir(directory)))
+    experiments = sorted({ name.split('_')[0] for name in index.entries })
+    paths = [path for experiment in experiments for path in index.files(experiment)]
+    exports = timer.measure('openCsv', lambda: [readAlchemistCsv(path) for path in paths], files=len(paths))
+    rows = sum(len(export.data) for export in exports)
+    timer.results['openCsv']['rows_per_second'] = rows / timer.results['openCsv']['seconds']
+    column = exports[0].columns.index('time') if exports else 0
+    resampled = timer.measure('convert', lambda: process.convertBatch(column, timeline, [export.data for export in exports]), files=len(paths), rows=rows)
+    resampled = dict(zip(paths, resampled))
+    def assemble():
+        result = {}
+        for experiment in experiments:
+            files = index.files(experiment)
+            dimensions = index.dimensions(experiment)
+            positions = index.positions(experiment, dimensions)
+            result[experiment] = process.assembleRuns(
+                [resampled[path] for path in files], [positions[path] for path in files],
+                dimensions, exports[0].columns, 'time', timeline,
+            )
+        return result
+    datasets = timer.measure('assembly', assemble, files=len(paths), rows=len(paths) * timeSamples)
+    def reduce():
+        result = {}
+        for experiment, dataset in datasets.items():
+            merging = [seed for seed in seedVars if seed in dataset.coords]
+            result[experiment] = (dataset.mean(dim=merging, skipna=True), dataset.std(dim=merging, skipna=True))
+        return result
+    statistics = timer.measure('reduction', reduce, files=len(paths), rows=len(paths) * timeSamples)
+    with tempfile.TemporaryDirectory() as output:
+        def store():
+            for experiment, (means, stdevs) in statistics.items():
+                process.writeSummaryStore(output + '/summary', experiment, {'mean': means, 'std': stdevs, 'runs': datasets[experiment]})
+        timer.measure('store', store, files=len(paths))
+        def render():
+            specs = []
+            for experiment, (means, stdevs) in statistics.items():
+                specs += process.generate_all_charts(process.MarginalLattice(means), process.MarginalLattice(stdevs), output + '/charts', 'time', str, str, (minTime, maxTime), basedir=experiment)[:charts]
+            process.renderCharts(specs)
+            return len(specs)
+        rendered = timer.measure('charts', render)
+        timer.results['charts']['files_per_second'] = rendered / timer.results['charts']['seconds'] if rendered else None
+    timer.results['total'] = {
+        'files': len(paths),
+        'rows': rows,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10,
+    }
+    return timer.results
+
+def compareWithBaseline(results, baseline, tolerance=1.2):
+    """
+    Prints the measures of each phase next to a baseline.
+
+    Parameters
+    ----------
+    results : dict
+        the measures of each phase, as returned by benchmarkPhases
+    baseline : dict
+        measures of a previous run, possibly empty
+    tolerance : float
+        slowdown ratio above which a phase is a regression
+
+    Returns
+    -------
+    list of str
+        the phases that regressed
+
+    """
+    regressions = []
+    def show(value, unit):
+        return f'{value:10.1f} {unit}' if value is not None else ' ' * (11 + len(unit))
+    for name, measures in results.items():
+        if name == 'total':
+            continue
+        line = f'{name:>12}: {measures["seconds"]:8.3f}s {show(measures["files_per_second"], "files/s")} {show(measures["rows_per_second"], "rows/s")} {show(measures["peak_mb"], "MB")}'
+        if name in baseline:
+            ratio = measures['seconds'] / baseline[name]['seconds'] if baseline[name]['seconds'] else float('inf')
+            line += f'  {ratio:5.2f}x baseline'
+            if ratio > tolerance:
+                line += ' REGRESSION'
+                regressions.append(name)
+        print(line)
+    total = results['total']
+    print(f'{"total":>12}: {total["files"]} files, {total["rows"]} rows, {total["max_rss_mb"]:.1f} MB max RSS')
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the processing of Alchemist exports')
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help='write a synthetic dataset of Alchemist exports')
+    generate.add_argument('directory', help='where to write the files')
+    generate.add_argument('--experiment', default='1-exported-data', help='experiment prefix of the file names')
+    generate.add_argument('--sweep', default='{"agentFrequency": [1.0, 2.0, 4.0], "speed": [1.0], "variance": [0.0, 0.5, 0.7], "numberOfDrones": [16]}',
+        help='JSON object with the values of each simulation variable')
+    generate.add_argument('--seeds', type=int, default=10, help='seeds per combination of the sweep')
+    generate.add_argument('--rows', type=int, default=1500, help='time instants per run')
+    generate.add_argument('--suffix', default='.csv', choices=list(process.exportCodecs), help='file suffix, compressed unless .csv')
+    readers = commands.add_parser('readers', help='compare the CSV readers')
+    readers.add_argument('--directory', default='data', help='where to find Alchemist data files')
+    readers.add_argument('--limit', type=int, default=500, help='maximum number of files to read')
+    readers.add_argument('--repeat', type=int, default=3, help='repetitions of each measure')
+    phases = commands.add_parser('phases', help='time each processing phase')
+    phases.add_argument('--directory', default='data', help='where to find Alchemist data files')
+    phases.add_argument('--charts', type=int, default=8, help='charts rendered per experiment')
+    phases.add_argument('--no-memory', action='store_true', help='do not trace the peak memory of each phase')
+    phases.add_argument('--baseline', default='benchmark_baseline.json', help='measures to compare with')
+    phases.add_argument('--save-baseline', action='store_true', help='store these measures as the new baseline')
+    phases.add_argument('--tolerance', type=float, default=1.2, help='slowdown ratio reported as a regression')
+    args = parser.parse_args()
+    if args.command == 'generate':
+        count = generateDataset(args.directory, args.experiment, json.loads(args.sweep), args.seeds, args.rows, suffix=args.suffix)
+        print(f'Generated {count} files in {args.directory}')
+    elif args.command == 'readers':
+        files = sorted(args.directory + '/' + name for name in os.listdir(args.directory) if name.endswith('.csv'))
+        benchmarkReaders(files[:args.limit], args.repeat)
+    else:
+        results = benchmarkPhases(args.directory, charts=args.charts, traceMemory=not args.no_memory)
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as file:
+                baseline = json.load(file)
+        regressions = compareWithBaseline(results, baseline, args.tolerance)
+        if args.save_baseline:
+            with open(args.baseline, 'w') as file:
+                json.dump(results, file, indent=1)
+        raise SystemExit(1 if regressions else 0)
@@ -1,12 +1,128 @@
 import numpy as np
-import xarray as xr
+import os
+import pickle
 import re
 from pathlib import Path
 import collections
+import contextlib
+import time
 
-def distance(val, ref):
-    return abs(ref - val)
-vectDistance = np.vectorize(distance)
+class Instrumentation:
+    """
+    Per-phase timers and counters of a processing run. Phases can also
+    trace their peak memory (with tracemalloc) and run under cProfile.
+    When disabled, phases and counters cost a function call and nothing
+    else.
+
+    Parameters
+    ----------
+    enabled : bool
+        whether to measure anything
+    traceMemory : bool
+        whether to trace the peak memory allocated in each phase
+    profile : list of str
+        names of the phases to run under cProfile
+    profileOutput : str
+        prefix of the cProfile statistics files, one per profiled phase
+        (all its calls), written by save
+    """
+    def __init__(self, enabled=False, traceMemory=False, profile=(), profileOutput='profile'):
+        self.enabled = enabled
+        self.traceMemory = traceMemory
+        self.profile = set(profile)
+        self.profileOutput = profileOutput
+        self.phases = {}
+        self.counters = {}
+        self.profilers = {}
+
+    def phase(self, name):
+        """
+        Measures the enclosed block as a phase of the run: with
+        instrumentation.phase('ingest'): ...
+
+        Parameters
+        ----------
+        name : str
+            name of the phase, measures of phases with the same name add up
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self.measure(name)
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        import tracemalloc
+        startedTracing = self.traceMemory and not tracemalloc.is_tracing()
+        if startedTracing:
+            tracemalloc.start()
+        elif self.traceMemory:
+            tracemalloc.reset_peak()
+        profiler = None
+        if name in self.profile:
+            import cProfile
+            # One profiler per phase, so that the statistics of all the calls add up
+            profiler = self.profilers.setdefault(name, cProfile.Profile())
+            profiler.enable()
+        start = time.perf_counter()
+        cpuStart = time.process_time()
+        try:
+            yield
+        finally:
+            measures = self.phases.setdefault(name, {'seconds': 0.0, 'cpuSeconds': 0.0, 'calls': 0})
+            measures['seconds'] += time.perf_counter() - start
+            measures['cpuSeconds'] += time.process_time() - cpuStart
+            measures['calls'] += 1
+            if profiler is not None:
+                profiler.disable()
+                measures['profile'] = f'{self.profileOutput}_{name}.prof'
+            if self.traceMemory:
+                peak = tracemalloc.get_traced_memory()[1] / 2**20
+                measures['peakMemoryMB'] = max(peak, measures.get('peakMemoryMB', 0))
+                if startedTracing:
+                    tracemalloc.stop()
+
+    def count(self, name, amount=1):
+        """
+        Increments a counter.
+
+        Parameters
+        ----------
+        name : str
+            name of the counter
+        amount : int
+            the increment
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        """
+        Returns
+        -------
+        dict
+            the measures of each phase and the counters
+        """
+        return {'phases': self.phases, 'counters': self.counters}
+
+    def save(self, path):
+        """
+        Writes the report as JSON, and the statistics of the profiled
+        phases, if instrumentation is enabled.
+
+        Parameters
+        ----------
+        path : str
+            the target file
+        """
+        if self.enabled:
+            import json
+            with open(path, 'w') as file:
+                json.dump(self.report(), file, indent=1)
+            for name, profiler in self.profilers.items():
+                profiler.dump_stats(self.phases[name]['profile'])
+
+# Instrumentation of the current run, disabled unless configured
+instrumentation = Instrumentation()
 
 def cmap_xmap(function, cmap):
     """ Applies function, on the indices of colormap cmap. Beware, function
@@ -14,6 +130,7 @@ def cmap_xmap(function, cmap):
 
     See also cmap_xmap.
     """
+    import matplotlib.colors
     cdict = cmap._segmentdata
     function_to_map = lambda x : (function(x[0]), x[1], x[2])
     for key in ('red','green','blue'):
@@ -22,24 +139,310 @@ def cmap_xmap(function, cmap):
 #        assert (cdict[key][0]<0 or cdict[key][-1]>1), "Resulting indices extend out of the [0, 1] segment."
     return matplotlib.colors.LinearSegmentedColormap('colormap',cdict,1024)
 
-def getClosest(sortedMatrix, column, val):
-    while len(sortedMatrix) > 3:
-        half = int(len(sortedMatrix) / 2)
-        sortedMatrix = sortedMatrix[-half - 1:] if sortedMatrix[half, column] < val else sortedMatrix[: half + 1]
-    if len(sortedMatrix) == 1:
-        result = sortedMatrix[0].copy()
-        result[column] = val
-        return result
-    else:
-        safecopy = sortedMatrix.copy()
-        safecopy[:, column] = vectDistance(safecopy[:, column], val)
-        minidx = np.argmin(safecopy[:, column])
-        safecopy = safecopy[minidx, :].A1
-        safecopy[column] = val
-        return safecopy
+def closestIndices(times, samples):
+    """
+    Finds, for every sample, the row whose time is the closest to it.
+
+    The search is a binary search over the sorted time column, vectorized
+    over all the samples and (optionally) over a stack of runs at once. It
+    retraces the same bisection steps of the original row-by-row search,
+    so that ties (equidistant or duplicated timestamps) resolve to the same
+    row: the search window is halved, keeping the pivot, until at most
+    three rows are left, and the first of them with minimum distance wins.
+
+    Parameters
+    ----------
+    times : array_like
+        sorted time column, either 1-D (rows) or 2-D (runs x rows)
+    samples : array_like
+        1-D array with the times to resample at
+
+    Returns
+    -------
+    ndarray
+        integer indices of shape (samples,) for 1-D input, (runs, samples)
+        for 2-D input
+
+    """
+    times = np.asarray(times, dtype=float)
+    samples = np.asarray(samples, dtype=float)
+    runs = np.atleast_2d(times)
+    count, length = runs.shape
+    if length == 0:
+        raise ValueError('Cannot resample an empty time column')
+    rows = np.arange(count)[:, None]
+    lower = np.zeros((count, samples.size), dtype=np.intp)
+    # The window length does not depend on the comparisons, only the offset does
+    while length > 3:
+        half = length // 2
+        pivot = runs[rows, lower + half]
+        lower = np.where(pivot < samples, lower + length - half - 1, lower)
+        length = half + 1
+    window = lower[..., None] + np.arange(length)
+    distances = np.abs(samples[:, None] - runs[rows[..., None], window])
+    result = np.take_along_axis(window, np.argmin(distances, axis=-1)[..., None], axis=-1)[..., 0]
+    return result if times.ndim > 1 else result[0]
 
 def convert(column, samples, matrix):
-    return np.matrix([getClosest(matrix, column, t) for t in samples])
+    """
+    Resamples a run on a new timeline, picking for each time sample the
+    closest row of the original data.
+
+    Parameters
+    ----------
+    column : int
+        index of the time column
+    samples : array_like
+        the new timeline
+    matrix : array_like
+        the data of a run, one row per time instant, sorted by time
+
+    Returns
+    -------
+    ndarray
+        a (samples x columns) matrix, whose time column is the new timeline
+
+    """
+    matrix = np.asarray(matrix)
+    result = matrix[closestIndices(matrix[:, column], samples)]
+    result[:, column] = samples
+    return result
+
+def convertBatch(column, samples, matrices):
+    """
+    Resamples many runs on the same timeline at once. Runs sharing the same
+    number of rows are stacked and resampled together.
+
+    Parameters
+    ----------
+    column : int
+        index of the time column
+    samples : array_like
+        the new timeline
+    matrices : list of array_like
+        the data of the runs, as accepted by convert
+
+    Returns
+    -------
+    list of ndarray
+        the resampled runs, in the same order of the input
+
+    """
+    matrices = [np.asarray(matrix) for matrix in matrices]
+    samples = np.asarray(samples, dtype=float)
+    groups = collections.defaultdict(list)
+    for position, matrix in enumerate(matrices):
+        groups[matrix.shape].append(position)
+    result = [None] * len(matrices)
+    for positions in groups.values():
+        stacked = np.stack([matrices[position] for position in positions])
+        indices = closestIndices(stacked[:, :, column], samples)
+        resampled = np.take_along_axis(stacked, indices[..., None], axis=1)
+        resampled[:, :, column] = samples
+        for position, data in zip(positions, resampled):
+            result[position] = data
+    return result
+
+def binCenters(edges):
+    """
+    Parameters
+    ----------
+    edges : ndarray
+        the edges of consecutive time bins
+
+    Returns
+    -------
+    ndarray
+        the time in the middle of each bin
+    """
+    edges = np.asarray(edges, dtype=float)
+    return (edges[:-1] + edges[1:]) / 2
+
+def mergeBins(bins, times, edges):
+    """
+    Merges time bins, sorted by time, into coarser bins. Count and sum are
+    added, minimum and maximum are reduced, so that merging is exact: the
+    result is the same as binning the raw rows directly.
+
+    Parameters
+    ----------
+    bins : ndarray
+        the bins to merge, of shape (4, bins, ...): count, sum, minimum, and
+        maximum of the values in each bin
+    times : array_like
+        sorted time of each bin to merge
+    edges : array_like
+        the edges of the new bins, left-closed, except the last one which is
+        closed on both sides; bins outside are dropped
+
+    Returns
+    -------
+    ndarray
+        the new bins, of shape (4, len(edges) - 1, ...)
+
+    """
+    times = np.asarray(times, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    starts = np.searchsorted(times, edges[:-1], side='left')
+    ends = np.searchsorted(times, edges[1:], side='left')
+    ends[-1] = np.searchsorted(times, edges[-1], side='right')
+    # A neutral bin at the end keeps every index in range, even for empty bins
+    neutral = np.zeros((4, 1) + bins.shape[2:])
+    neutral[2:] = np.nan
+    padded = np.concatenate([bins, neutral], axis=1)
+    # Each bin spans a contiguous range of rows: reduce over [start, end) pairs and keep the even results
+    bounds = np.stack([starts, ends], axis=-1).ravel()
+    empty = (starts == ends).reshape((-1,) + (1,) * (bins.ndim - 2))
+    result = np.stack([
+        np.add.reduceat(padded[0], bounds, axis=0)[::2],
+        np.add.reduceat(padded[1], bounds, axis=0)[::2],
+        np.fmin.reduceat(padded[2], bounds, axis=0)[::2],
+        np.fmax.reduceat(padded[3], bounds, axis=0)[::2],
+    ])
+    result[:2] = np.where(empty, 0.0, result[:2])
+    result[2:] = np.where(empty, np.nan, result[2:])
+    return result
+
+def timeBins(column, edges, matrix):
+    """
+    Reduces every row of a run into time bins, in a single vectorized pass.
+
+    Parameters
+    ----------
+    column : int
+        index of the time column
+    edges : array_like
+        the edges of the time bins
+    matrix : array_like
+        the data of a run, one row per time instant, sorted by time
+
+    Returns
+    -------
+    ndarray
+        the bins, of shape (4, bins, columns): count (of values other than
+        NaN), sum, minimum, and maximum of each column in each bin
+
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    valid = ~np.isnan(matrix)
+    rows = np.stack([valid.astype(float), np.where(valid, matrix, 0.0), matrix, matrix])
+    return mergeBins(rows, matrix[:, column], edges)
+
+def coarsenBins(bins, binEdges, edges):
+    """
+    Merges fine time bins into coarser ones. Each fine bin goes in the
+    coarse bin containing its center, so the result is exact when every
+    coarse edge is also a fine edge (e.g., linear bins whose number is a
+    multiple of the coarse one).
+
+    Parameters
+    ----------
+    bins : ndarray
+        the fine bins, as returned by timeBins
+    binEdges : array_like
+        the edges of the fine bins
+    edges : array_like
+        the edges of the coarse bins
+
+    Returns
+    -------
+    ndarray
+        the coarse bins
+    """
+    return mergeBins(bins, binCenters(binEdges), edges)
+
+def binStatistic(bins, statistic, column, timeline):
+    """
+    Takes a statistic of each time bin.
+
+    Parameters
+    ----------
+    bins : ndarray
+        the bins, as returned by timeBins
+    statistic : str
+        'mean', 'min', 'max', or 'count'
+    column : int
+        index of the time column, which is replaced by the timeline
+    timeline : array_like
+        the time of each bin
+
+    Returns
+    -------
+    ndarray
+        the statistic, of shape (bins, columns, ...), NaN (0 for the count)
+        where a bin is empty
+
+    Raises
+    ------
+    ValueError
+        if the statistic is unknown
+
+    """
+    count, total, low, high = bins
+    if statistic == 'mean':
+        values = np.divide(total, count, out=np.full_like(total, np.nan), where=count > 0)
+    elif statistic in ('min', 'max', 'count'):
+        values = { 'min': low, 'max': high, 'count': count }[statistic].copy()
+    else:
+        raise ValueError(f'Unknown bin statistic: {statistic}')
+    values[:, column] = np.reshape(timeline, (-1,) + (1,) * (values.ndim - 2))
+    return values
+
+def binnedRuns(bins, binEdges, edges, statistic, column):
+    """
+    Coarsens the time bins of many runs at once, and takes a statistic of
+    each bin.
+
+    Parameters
+    ----------
+    bins : list of ndarray
+        the bins of each run, as returned by timeBins
+    binEdges : array_like
+        the edges of the bins
+    edges : array_like
+        the edges of the bins to coarsen to
+    statistic : str
+        'mean', 'min', 'max', or 'count'
+    column : int
+        index of the time column
+
+    Returns
+    -------
+    list of ndarray
+        the statistic of each run, of shape (bins x columns), as resampled
+        runs
+    """
+    stacked = np.stack(bins, axis=-1)
+    if not np.array_equal(binEdges, edges):
+        stacked = coarsenBins(stacked, binEdges, edges)
+    values = binStatistic(stacked, statistic, column, binCenters(edges))
+    return list(np.moveaxis(values, -1, 0))
+
+def coarsenSamples(values, axis, factor):
+    """
+    Merges every few consecutive samples along an axis, skipping NaN.
+
+    Parameters
+    ----------
+    values : ndarray
+        the samples
+    axis : int
+        the axis to merge
+    factor : int
+        how many samples are merged, the last group may have fewer
+
+    Returns
+    -------
+    tuple of ndarray
+        the mean, the minimum, and the maximum of each group, NaN where
+        all of its samples are NaN
+    """
+    values = np.asarray(values, dtype=float)
+    starts = np.arange(0, values.shape[axis], factor)
+    count = np.add.reduceat(~np.isnan(values), starts, axis=axis)
+    total = np.add.reduceat(np.nan_to_num(values), starts, axis=axis)
+    mean = np.divide(total, count, out=np.full_like(total, np.nan), where=count > 0)
+    return mean, np.fmin.reduceat(values, starts, axis=axis), np.fmax.reduceat(values, starts, axis=axis)
 
 def valueOrEmptySet(k, d):
     return (d[k] if isinstance(d[k], set) else {d[k]}) if k in d else set()
@@ -68,6 +471,105 @@ def mergeDicts(d1, d2):
         res[k] = valueOrEmptySet(k, d1) | valueOrEmptySet(k, d2)
     return res
 
+def parseVariables(line):
+    """
+    Parses the variables declared in an Alchemist header line.
+
+    Parameters
+    ----------
+    line : str
+        a header line, such as '# speed = 1.0, seed = 0.0'
+
+    Returns
+    -------
+    dict
+        A dictionary whose keys are the variable names and values are the
+        parsed (float, bool, or str) variable values. Empty if the line
+        declares no variable
+
+    """
+    regex = r"(?P<varName>[a-zA-Z._-]+) = (?P<varValue>[^,]*),?"
+    match = re.findall(regex, line.replace('Infinity', '1e30000'))
+    return { var : parseValue(value) for var, value in match }
+
+def parseValue(value):
+    """
+    Converts the textual value of an Alchemist variable to its type.
+
+    Parameters
+    ----------
+    value : str
+        the value, as written in a header or in a file name
+
+    Returns
+    -------
+    float or bool or str
+        the typed value
+
+    """
+    is_float = r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?"
+    return (float(value) if re.match(is_float, value)
+        else bool(re.match(r".*?true.*?", value.lower())) if re.match(r".*?(true|false).*?", value.lower())
+        else value)
+
+def parseColumnNames(line):
+    """
+    Parses the column names from the last line of an Alchemist header.
+
+    Parameters
+    ----------
+    line : str
+        the last header line, such as '# time error '
+
+    Returns
+    -------
+    list of str
+        The column names, in order
+
+    """
+    return re.findall(r' (?P<varName>\S+)', line)
+
+# Suffixes of the Alchemist exports, and the standard module decompressing each of them
+exportCodecs = {'.csv': None, '.csv.gz': 'gzip', '.csv.xz': 'lzma', '.csv.bz2': 'bz2'}
+
+def exportSuffix(name):
+    """
+    Parameters
+    ----------
+    name : str
+        a file name or path
+
+    Returns
+    -------
+    str or None
+        the suffix of the Alchemist export (as in exportCodecs), None if the
+        file is not an export
+    """
+    return next((suffix for suffix in reversed(exportCodecs) if name.endswith(suffix)), None)
+
+def openExport(path, mode='rb'):
+    """
+    Opens an Alchemist export, plain or compressed: compressed files are
+    decompressed on the fly while being read, with no temporary copy.
+
+    Parameters
+    ----------
+    path : str
+        path to the target file
+    mode : str
+        'rb' or 'wb' for bytes, 'rt' or 'wt' for text
+
+    Returns
+    -------
+    file object
+        the open (decompressing) file
+    """
+    codec = exportCodecs.get(exportSuffix(path))
+    if codec is None:
+        return open(path, mode)
+    import importlib
+    return importlib.import_module(codec).open(path, mode)
+
 def extractCoordinates(filename):
     """
     Scans the header of an Alchemist file in search of the variables.
@@ -86,20 +588,12 @@ def extractCoordinates(filename):
         lists (set of variable values)
 
     """
-    with open(filename, 'r') as file:
-#        regex = re.compile(' (?P<varName>[a-zA-Z._-]+) = (?P<varValue>[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?),?')
-        regex = r"(?P<varName>[a-zA-Z._-]+) = (?P<varValue>[^,]*),?"
+    with openExport(filename, 'rt') as file:
         dataBegin = r"\d"
-        is_float = r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?"
         for line in file:
-            match = re.findall(regex, line.replace('Infinity', '1e30000'))
+            match = parseVariables(line)
             if match:
-                return {
-                    var : float(value) if re.match(is_float, value)
-                        else bool(re.match(r".*?true.*?", value.lower())) if re.match(r".*?(true|false).*?", value.lower())
-                        else value
-                    for var, value in match
-                }
+                return match
             elif re.match(dataBegin, line[0]):
                 return {}
 
@@ -118,8 +612,8 @@ def extractVariableNames(filename):
         A matrix with the values of the csv file
 
     """
-    with open(filename, 'r') as file:
-        dataBegin = re.compile('\d')
+    with openExport(filename, 'rt') as file:
+        dataBegin = re.compile(r'\d')
         lastHeaderLine = ''
         for line in file:
             if dataBegin.match(line[0]):
@@ -127,13 +621,84 @@ def extractVariableNames(filename):
             else:
                 lastHeaderLine = line
         if lastHeaderLine:
-            regex = re.compile(' (?P<varName>\S+)')
-            return regex.findall(lastHeaderLine)
+            return parseColumnNames(lastHeaderLine)
         return []
 
+AlchemistExport = collections.namedtuple('AlchemistExport', ['data', 'variables', 'columns'])
+
+def readAlchemistCsv(path, dtype=np.float64):
+    """
+    Reads an Alchemist export file in a single pass, returning its header
+    variables, its column names, and its numeric content.
+
+    The numeric body is parsed straight into a contiguous array. The footer
+    written at the end of the simulation is ignored, and so is a last line
+    left incomplete by an interrupted run. Compressed exports (see
+    exportCodecs) are decompressed in memory.
+
+    Parameters
+    ----------
+    path : str
+        path to the target file
+    dtype : data-type
+        the type of the returned matrix
+
+    Returns
+    -------
+    AlchemistExport
+        A named tuple with the (rows x columns) data matrix, the dictionary
+        of the header variables (as extractCoordinates), and the list of the
+        column names (as extractVariableNames)
+
+    """
+    with openExport(path, 'rb') as file:
+        content = file.read()
+    variables, columns, position = parseHeader(content)
+    footer = content.find(b'\n#', position)
+    if footer >= 0:
+        body = content[position:footer + 1]
+    else:
+        # Interrupted run: the last line may have been cut while being written
+        body = content[position:content.rfind(b'\n') + 1] if position < len(content) else b''
+    width = len(columns) or len(body[:body.find(b'\n')].split())
+    values = np.fromstring(body, dtype=dtype, sep=' ') if body.strip() else np.empty(0, dtype=dtype)
+    rows = values.size // width if width else 0
+    return AlchemistExport(values[:rows * width].reshape(rows, width), variables, columns)
+
+def parseHeader(content):
+    """
+    Parses the header of an Alchemist export, up to the first data line.
+
+    Parameters
+    ----------
+    content : bytes
+        the content of the file, or its beginning
+
+    Returns
+    -------
+    tuple
+        The dictionary of the header variables, the list of the column
+        names, and the position where the data begins (the end of the
+        content if no data line has been found)
+
+    """
+    variables = {}
+    lastHeaderLine = ''
+    position = 0
+    while position < len(content) and not content[position:position + 1].isdigit():
+        end = content.find(b'\n', position)
+        end = len(content) if end < 0 else end + 1
+        line = content[position:end].decode()
+        if not variables:
+            variables = parseVariables(line)
+        lastHeaderLine = line
+        position = end
+    columns = parseColumnNames(lastHeaderLine) if lastHeaderLine else []
+    return variables, columns, position
+
 def openCsv(path):
     """
-    Converts an Alchemist export file into a list of lists representing the matrix of values.
+    Converts an Alchemist export file into a matrix of values.
 
     Parameters
     ----------
@@ -142,392 +707,3358 @@ def openCsv(path):
 
     Returns
     -------
-    list of list
+    ndarray
         A matrix with the values of the csv file
 
     """
-    regex = re.compile('\d')
-    with open(path, 'r') as file:
-        lines = filter(lambda x: regex.match(x[0]), file.readlines())
-        return [[float(x) for x in line.split()] for line in lines]
+    return readAlchemistCsv(path).data
 
-def beautifyValue(v):
+def resampleFiles(paths, timeColumnName, timeline, binned=False):
     """
-    Converts an object to a better version for printing, in particular:
-        - if the object converts to float, then its float value is used
-        - if the object can be rounded to int, then the int value is preferred
+    Reads a group of Alchemist exports and resamples them on a timeline.
+    This is the unit of work of the ingestion, and it runs in the worker
+    processes when ingesting in parallel.
 
     Parameters
     ----------
-    v : object
-        the object to try to beautify
+    paths : list of str
+        paths to the target files
+    timeColumnName : str
+        name of the time column
+    timeline : ndarray
+        the time samples, or the edges of the time bins if binned
+    binned : bool
+        whether to reduce all the rows in time bins (see timeBins) rather
+        than picking the closest row to each sample
 
     Returns
     -------
-    object or float or int
-        the beautified value
-    """
-    try:
-        v = float(v)
-        if v.is_integer():
-            return int(v)
-        return v
-    except:
-        return v
+    tuple
+        The list of AlchemistExport whose data has been resampled, the CPU
+        seconds spent processing them, and the number of rows parsed
 
-if __name__ == '__main__':
-    # CONFIGURE SCRIPT
-    # Where to find Alchemist data files
-    directory = 'data'
-    # Where to save charts
-    output_directory = 'charts'
-    # How to name the summary of the processed data
-    pickleOutput = 'data_summary'
-    # Experiment prefixes: one per experiment (root of the file name)
-    experiments = ['1-exported-data', '2-exported-data', '3-exported-data']
-    floatPrecision = '{: 0.3f}'
-    # Number of time samples
-    timeSamples = 100
-    # time management
-    minTime = 0
-    maxTime = 1500
-    timeColumnName = 'time'
-    logarithmicTime = False
-    # One or more variables are considered random and "flattened"
-    seedVars = ['seed']
-    # Label mapping
-    class Measure:
-        def __init__(self, description, unit = None):
-            self.__description = description
-            self.__unit = unit
-        def description(self):
-            return self.__description
-        def unit(self):
-            return '' if self.__unit is None else f'({self.__unit})'
-        def derivative(self, new_description = None, new_unit = None):
-            def cleanMathMode(s):
-                return s[1:-1] if s[0] == '$' and s[-1] == '$' else s
-            def deriveString(s):
-                return r'$d ' + cleanMathMode(s) + r'/{dt}$'
-            def deriveUnit(s):
-                return f'${cleanMathMode(s)}' + '/{s}$' if s else None
-            result = Measure(
-                new_description if new_description else deriveString(self.__description),
-                new_unit if new_unit else deriveUnit(self.__unit),
-            )
-            return result
-        def __str__(self):
-            return f'{self.description()} {self.unit()}'
-
-    centrality_label = 'H_a(x)'
-    def expected(x):
-        return r'\mathbf{E}[' + x + ']'
-    def stdev_of(x):
-        return r'\sigma{}[' + x + ']'
-    def mse(x):
-        return 'MSE[' + x + ']'
-    def cardinality(x):
-        return r'\|' + x + r'\|'
-
-    labels = {
-        'nodeCount': Measure(r'$n$', 'nodes'),
-        'harmonicCentrality[Mean]': Measure(f'${expected("H(x)")}$'),
-        'meanNeighbors': Measure(f'${expected(cardinality("N"))}$', 'nodes'),
-        'speed': Measure(r'$\|\vec{v}\|$', r'$m/s$'),
-        'msqer@harmonicCentrality[Max]': Measure(r'$\max{(' + mse(centrality_label) + ')}$'),
-        'msqer@harmonicCentrality[Min]': Measure(r'$\min{(' + mse(centrality_label) + ')}$'),
-        'msqer@harmonicCentrality[Mean]': Measure(f'${expected(mse(centrality_label))}$'),
-        'msqer@harmonicCentrality[StandardDeviation]': Measure(f'${stdev_of(mse(centrality_label))}$'),
-        'org:protelis:tutorial:distanceTo[max]': Measure(r'$m$', 'max distance'),
-        'org:protelis:tutorial:distanceTo[mean]': Measure(r'$m$', 'mean distance'),
-        'org:protelis:tutorial:distanceTo[min]': Measure(r'$m$', ',min distance'),
-    }
-    def derivativeOrMeasure(variable_name):
-        if variable_name.endswith('dt'):
-            return labels.get(variable_name[:-2], Measure(variable_name)).derivative()
-        return Measure(variable_name)
-    def label_for(variable_name):
-        return labels.get(variable_name, derivativeOrMeasure(variable_name)).description()
-    def unit_for(variable_name):
-        return str(labels.get(variable_name, derivativeOrMeasure(variable_name)))
-
-    # Setup libraries
-    np.set_printoptions(formatter={'float': floatPrecision.format})
-    # Read the last time the data was processed, reprocess only if new data exists, otherwise just load
-    import pickle
-    import os
-    if os.path.exists(directory):
-        newestFileTime = max([os.path.getmtime(directory + '/' + file) for file in os.listdir(directory)], default=0.0)
-        try:
-            lastTimeProcessed = pickle.load(open('timeprocessed', 'rb'))
-        except:
-            lastTimeProcessed = -1
-        shouldRecompute = not os.path.exists(".skip_data_process") and newestFileTime != lastTimeProcessed
-        if not shouldRecompute:
-            try:
-                means = pickle.load(open(pickleOutput + '_mean', 'rb'))
-                stdevs = pickle.load(open(pickleOutput + '_std', 'rb'))
-            except:
-                shouldRecompute = True
-        if shouldRecompute:
-            timefun = np.logspace if logarithmicTime else np.linspace
-            means = {}
-            stdevs = {}
-            for experiment in experiments:
-                # Collect all files for the experiment of interest
-                import fnmatch
-                allfiles = filter(lambda file: fnmatch.fnmatch(file, experiment + '_*.csv'), os.listdir(directory))
-                allfiles = [directory + '/' + name for name in allfiles]
-
-                allfiles.sort()
-                # From the file name, extract the independent variables
-                dimensions = {}
-                for file in allfiles:
-                    dimensions = mergeDicts(dimensions, extractCoordinates(file))
-                dimensions = {k: sorted(v) for k, v in dimensions.items()}
-                # Add time to the independent variables
-                dimensions[timeColumnName] = range(0, timeSamples)
-                # Compute the matrix shape
-                shape = tuple(len(v) for k, v in dimensions.items())
-                # Prepare the Dataset
-                dataset = xr.Dataset()
-                for k, v in dimensions.items():
-                    dataset.coords[k] = v
-                if len(allfiles) == 0:
-                    print("WARNING: No data for experiment " + experiment)
-                    means[experiment] = dataset
-                    stdevs[experiment] = xr.Dataset()
-                else:
-                    varNames = extractVariableNames(allfiles[0])
-                    for v in varNames:
-                        if v != timeColumnName:
-                            novals = np.ndarray(shape)
-                            novals.fill(float('nan'))
-                            dataset[v] = (dimensions.keys(), novals)
-                    # Compute maximum and minimum time, create the resample
-                    timeColumn = varNames.index(timeColumnName)
-                    allData = { file: np.matrix(openCsv(file)) for file in allfiles }
-                    computeMin = minTime is None
-                    computeMax = maxTime is None
-                    if computeMax:
-                        maxTime = float('-inf')
-                        for data in allData.values():
-                            maxTime = max(maxTime, data[-1, timeColumn])
-                    if computeMin:
-                        minTime = float('inf')
-                        for data in allData.values():
-                            minTime = min(minTime, data[0, timeColumn])
-                    timeline = timefun(minTime, maxTime, timeSamples)
-                    # Resample
-                    for file in allData:
-    #                    print(file)
-                        allData[file] = convert(timeColumn, timeline, allData[file])
-                    # Populate the dataset
-                    for file, data in allData.items():
-                        dataset[timeColumnName] = timeline
-                        for idx, v in enumerate(varNames):
-                            if v != timeColumnName:
-                                darray = dataset[v]
-                                experimentVars = extractCoordinates(file)
-                                darray.loc[experimentVars] = data[:, idx].A1
-                    # Fold the dataset along the seed variables, producing the mean and stdev datasets
-                    mergingVariables = [seed for seed in seedVars if seed in dataset.coords]
-                    means[experiment] = dataset.mean(dim = mergingVariables, skipna=True)
-                    stdevs[experiment] = dataset.std(dim = mergingVariables, skipna=True)
-            # Save the datasets
-            pickle.dump(means, open(pickleOutput + '_mean', 'wb'), protocol=-1)
-            pickle.dump(stdevs, open(pickleOutput + '_std', 'wb'), protocol=-1)
-            pickle.dump(newestFileTime, open('timeprocessed', 'wb'))
+    """
+    start = time.process_time()
+    exports = [readAlchemistCsv(path) for path in paths]
+    column = exports[0].columns.index(timeColumnName) if exports else 0
+    if binned:
+        resampled = [timeBins(column, timeline, export.data) for export in exports]
     else:
-        means = { experiment: xr.Dataset() for experiment in experiments }
-        stdevs = { experiment: xr.Dataset() for experiment in experiments }
+        resampled = convertBatch(column, timeline, [export.data for export in exports])
+    result = [export._replace(data=data) for export, data in zip(exports, resampled)]
+    return result, time.process_time() - start, sum(len(export.data) for export in exports)
 
-    # QUICK CHARTING
+def timeBounds(paths, timeColumnName):
+    """
+    Computes the earliest initial time and the latest final time of a group
+    of Alchemist exports.
 
-    import matplotlib
-    import matplotlib.pyplot as plt
-    import matplotlib.cm as cmx
-    matplotlib.rcParams.update({'axes.titlesize': 12})
-    matplotlib.rcParams.update({'axes.labelsize': 10})
+    Parameters
+    ----------
+    paths : list of str
+        paths to the target files
+    timeColumnName : str
+        name of the time column
 
-    def make_line_chart(
-        xdata,
-        ydata,
-        title=None,
-        ylabel=None,
-        xlabel=None,
-        colors=None,
-        linewidth=1,
-        error_alpha=0.2,
-        figure_size=(6, 4)
-    ):
-        fig = plt.figure(figsize = figure_size)
-        ax = fig.add_subplot(1, 1, 1)
-        ax.set_title(title)
-        ax.set_xlabel(xlabel)
-        ax.set_ylabel(ylabel)
-#        ax.set_ylim(0)
-#        ax.set_xlim(min(xdata), max(xdata))
-        index = 0
-        for (label, (data, error)) in ydata.items():
-#            print(f'plotting {data}\nagainst {xdata}')
-            lines = ax.plot(xdata, data, label=label, color=colors(index / (len(ydata) - 1)) if colors else None, linewidth=linewidth)
-            index += 1
-            if error is not None:
-                last_color = lines[-1].get_color()
-                ax.fill_between(
-                    xdata,
-                    data+error,
-                    data-error,
-                    facecolor=last_color,
-                    alpha=error_alpha,
-                )
-        return (fig, ax)
-    def generate_all_charts(means, errors = None, basedir=''):
-        viable_coords = { coord for coord in means.coords if means[coord].size > 1 }
-        for comparison_variable in viable_coords - {timeColumnName}:
-            mergeable_variables = viable_coords - {timeColumnName, comparison_variable}
-            for current_coordinate in mergeable_variables:
-                merge_variables = mergeable_variables - { current_coordinate }
-                merge_data_view = means.mean(dim = merge_variables, skipna = True)
-                merge_error_view = errors.mean(dim = merge_variables, skipna = True)
-                for current_coordinate_value in merge_data_view[current_coordinate].values:
-                    beautified_value = beautifyValue(current_coordinate_value)
-                    for current_metric in merge_data_view.data_vars:
-                        title = f'{label_for(current_metric)} for diverse {label_for(comparison_variable)} when {label_for(current_coordinate)}={beautified_value}'
-                        for withErrors in [True, False]:
-                            fig, ax = make_line_chart(
-                                title = title,
-                                xdata = merge_data_view[timeColumnName],
-                                xlabel = unit_for(timeColumnName),
-                                ylabel = unit_for(current_metric),
-                                ydata = {
-                                    beautifyValue(label): (
-                                        merge_data_view.sel(selector)[current_metric],
-                                        merge_error_view.sel(selector)[current_metric] if withErrors else 0
-                                    )
-                                    for label in merge_data_view[comparison_variable].values
-                                    for selector in [{comparison_variable: label, current_coordinate: current_coordinate_value}]
-                                },
-                            )
-                            ax.set_xlim(minTime, maxTime)
-                            ax.legend()
-                            fig.tight_layout()
-                            by_time_output_directory = f'{output_directory}/{basedir}/{comparison_variable}'
-                            print(by_time_output_directory)
-                            Path(by_time_output_directory).mkdir(parents=True, exist_ok=True)
-                            figname = f'{comparison_variable}_{current_metric}_{current_coordinate}_{beautified_value}{"_err" if withErrors else ""}'
-                            for symbol in r".[]\/@:":
-                                figname = figname.replace(symbol, '_')
-                            fig.savefig(f'{by_time_output_directory}/{figname}.pdf')
-                            plt.close(fig)
+    Returns
+    -------
+    tuple of float
+        minimum and maximum time
 
-    for experiment in experiments:
-        current_experiment_means = means[experiment]
-        current_experiment_errors = stdevs[experiment]
-        #generate_all_charts(current_experiment_means, current_experiment_errors, basedir = f'{experiment}/all')
+    """
+    minTime = float('inf')
+    maxTime = float('-inf')
+    for path in paths:
+        export = readAlchemistCsv(path)
+        timeColumn = export.columns.index(timeColumnName)
+        minTime = min(minTime, export.data[0, timeColumn])
+        maxTime = max(maxTime, export.data[-1, timeColumn])
+    return minTime, maxTime
 
-# Custom charting
-    def custom_subplot(ax, ds, errors, evaluatingColumn, selected_variance, algorithm, color_value):
-        evaluatingValues = ds.coords[evaluatingColumn].values
-        viridis = plt.colormaps['viridis']
-        for idx, x in enumerate(selected_variance):
-            dataset = ds.sel(variance=x).to_dataframe()
-            errorsDataset = errors.sel(variance=x).to_dataframe()
-            sigmaMinus = dataset["error"] - errorsDataset["error"]
-            sigmaPlus = dataset["error"] + errorsDataset["error"]
-            ax[idx].plot(ds[timeColumnName], dataset['error'], label=algorithm, color=viridis(color_value), linewidth=2.0)
-            ax[idx].fill_between(ds[timeColumnName], sigmaMinus, sigmaPlus, color=viridis(color_value), alpha=0.2)
-            ax[idx].set_xlabel('Time ($ s $)')
-            ax[idx].set_ylim(0, 1900)
-            #ax[idx].set_ylabel('Squared Distance Error ($ m^2 $)')
-            ax[idx].set_title(f'Relative Drift $ (\\tau) $ = {x}')
-            ax[idx].legend()
-            ax[idx].margins(x=0)
-            
-    def baseline_subplot(ax, ds, errors, algorithm, color):
-        for i in range(len(ax)):
-            ds_df = ds.to_dataframe()
-            err_df = errors.to_dataframe()
-            sigmaMinus = ds_df["error"] - err_df["error"]
-            sigmaPlus = ds_df["error"] + err_df["error"]
-            ax[i].plot(ds[timeColumnName], ds_df['error'], label=algorithm, color=color, linestyle='dashed', linewidth=2.0)
-            ax[i].fill_between(ds[timeColumnName], sigmaMinus, sigmaPlus, color=color, alpha=0.2)
-            ax[i].legend()
-            ax[i].margins(x=0)
-            
-    from matplotlib.gridspec import SubplotSpec
-    def create_subtitle(fig: plt.Figure, grid: SubplotSpec, title: str):
-        "Sign sets of subplots with title"
-        row = fig.add_subplot(grid)
-        # the '\n' is important
-        row.set_title(f'{title}\n', fontweight='semibold')
-        # hide subplot
-        row.set_frame_on(False)
-        row.axis('off')
-                    
-
-    def error_over_time_charts_flattened(means, errors):
-        evaluatingColumn = "variance"
-        selected_frequencies = [1.0, 2.0]
-        selected_variance = [ 0.0, 0.5, 0.7 ]
-        fig, axes = plt.subplots(1, len(selected_variance), figsize=(18, 3), sharey=False, layout="constrained")
-        #grid = plt.GridSpec(len(selected_frequencies), len(selected_variance))
-        axes[0].set_ylabel('Squared Distance Error ($ m^2 $)')
-        
-        #fig.suptitle('Errors over time', fontweight='bold')
-        #create_subtitle(fig, grid[idf, ::], f'Agent Frequency = {f}')            
-
-        custom_subplot(axes, means["1-exported-data"].sel(agentFrequency=1.0), errors["1-exported-data"].sel(agentFrequency=1.0), evaluatingColumn, selected_variance, 'ACLP@1Hz', 0.1)
-        custom_subplot(axes, means["1-exported-data"].sel(agentFrequency=2.0), errors["1-exported-data"].sel(agentFrequency=2.0), evaluatingColumn, selected_variance, 'ACLP@2Hz', 0.3)
-        custom_subplot(axes, means["2-exported-data"].sel(agentFrequency=1.0), errors["2-exported-data"].sel(agentFrequency=1.0), evaluatingColumn, selected_variance, "ACLI@1Hz", 0.7)
-        custom_subplot(axes, means["2-exported-data"].sel(agentFrequency=2.0), errors["2-exported-data"].sel(agentFrequency=2.0), evaluatingColumn, selected_variance, "ACLI@2Hz", 0.9)
-        baseline_subplot(axes, means["3-exported-data"], errors["3-exported-data"], "AMA@1Hz", 'k')
-
-        fig.tight_layout()
-        Path(f'{output_directory}').mkdir(parents=True, exist_ok=True)
-        fig.savefig(f'{output_directory}/error_over_time_flattened.pdf')
-   
-    def variance_subplot(data, err, ax, values, algorithm, color):
-        viridis = plt.colormaps['viridis']
-        for idx, x in enumerate(values):
-            dataset = data.sel(agentFrequency=x).to_dataframe()
-            errorsDataset = err.sel(agentFrequency=x).to_dataframe()
-            sigmaMinus = dataset["error"] - errorsDataset["error"]
-            sigmaPlus = dataset["error"] + errorsDataset["error"]
-            ax[idx].plot(data["variance"], dataset['error'], label=f'{algorithm}@{int(x)}Hz', color=viridis(color), linewidth=2.0)
-            ax[idx].fill_between(data['variance'], sigmaMinus, sigmaPlus, color=viridis(color), alpha=0.2)
-            ax[idx].set_xlabel('Relative Drift ($ \\tau $)')
-            ax[idx].legend()
-            ax[idx].set_ylim(200, 1400)
-            ax[idx].margins(x=0)
-            
-    def variance_baseline_subplot(x, err, ax, values, algorithm, color):
-        for i in range(len(ax)):
-            ds_df = x.to_dataframe()
-            err_df = err.to_dataframe()
-            sigmaMinus = ds_df["error"] - err_df["error"]
-            sigmaPlus = ds_df["error"] + err_df["error"]
-            ax[i].axhline(ds_df['error'].item(), label=algorithm, color=color, linestyle='dashed', linewidth=2.0)
-            ax[i].fill_between(values, sigmaMinus, sigmaPlus, color=color, alpha=0.2)
-            ax[i].legend()
-
-    def error_over_variance(means, stdevs):
-        experiments = ["1-exported-data", "2-exported-data", "3-exported-data"]
-        colors = ["0.8", "0.2", "k"]
-        # selected_frequencies = means["1-exported-data"]['agentFrequency']
-        selected_frequencies = [1.0, 2.0, 4.0]
-        selected_variance = means["1-exported-data"]['variance']
-        fig, axes = plt.subplots(1, len(selected_frequencies), figsize=(18, 3), sharey=False, layout="constrained")
-        axes[0].set_ylabel('Squared Distance Error ($ m^2 $)')
-        variance_subplot(means['1-exported-data'].mean(dim='time'), stdevs['1-exported-data'].mean(dim='time'), axes, selected_frequencies, 'ACLP', 0.1)
-        variance_subplot(means["2-exported-data"].mean(dim='time'), stdevs["2-exported-data"].mean(dim="time"), axes, selected_frequencies, 'ACLI', 0.7)
-        variance_baseline_subplot(means["3-exported-data"].mean(dim='time'), stdevs["3-exported-data"].mean(dim='time'), axes, selected_variance, "AMA@1Hz", 'k')
-        fig.tight_layout()
-        Path(f'{output_directory}').mkdir(parents=True, exist_ok=True)
-        fig.savefig(f'{output_directory}/error_over_variances.pdf')
+def splitWork(items, workers, maxSize=None):
+    """
+    Splits a list in contiguous chunks, a few per worker so that the load
+    stays balanced.
 
-    # Create plots
+    Parameters
+    ----------
+    items : list
+        the items to split
+    workers : int
+        number of workers
+    maxSize : int
+        maximum number of items per chunk, unbounded if None
+
+    Returns
+    -------
+    list of list
+        the chunks, preserving the order of the items
+
+    """
+    size = max(1, -(-len(items) // (4 * workers)))
+    size = size if maxSize is None else min(size, maxSize)
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def iterateFiles(paths, timeColumnName, timeline, workers=1, chunkSize=None, binned=False):
+    """
+    Reads and resamples Alchemist exports, serially or with a pool of
+    worker processes, yielding them one at a time. The result does not
+    depend on the number of workers.
+
+    Parameters
+    ----------
+    paths : list of str
+        paths to the target files
+    timeColumnName : str
+        name of the time column
+    timeline : ndarray
+        the time samples
+    workers : int
+        number of worker processes, 1 processes the files in this process
+    chunkSize : int
+        maximum number of files read at once by a worker, unbounded if None
+    binned : bool
+        whether to reduce the rows in time bins, see resampleFiles
+
+    Yields
+    ------
+    AlchemistExport
+        the resampled exports, in the same order of the paths
+
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for chunk in splitWork(paths, 1, chunkSize):
+            exports, _, rows = resampleFiles(chunk, timeColumnName, timeline, binned)
+            countIngested(exports, rows, timeline)
+            yield from exports
+        return
+    import concurrent.futures
+    start = time.perf_counter()
+    chunks = splitWork(paths, workers, chunkSize)
+    busy = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for exports, elapsed, rows in executor.map(resampleFiles, chunks, [timeColumnName] * len(chunks), [timeline] * len(chunks), [binned] * len(chunks)):
+            countIngested(exports, rows, timeline)
+            yield from exports
+            busy += elapsed
+    elapsed = time.perf_counter() - start
+    print(f'Ingested {len(paths)} files with {workers} workers in {elapsed:.2f}s, speedup {busy / elapsed:.2f}x')
+
+def ingestFiles(paths, timeColumnName, timeline, workers=1, binned=False):
+    """
+    Reads and resamples Alchemist exports, serially or with a pool of
+    worker processes. The result does not depend on the number of workers.
+
+    Parameters
+    ----------
+    paths : list of str
+        paths to the target files
+    timeColumnName : str
+        name of the time column
+    timeline : ndarray
+        the time samples
+    workers : int
+        number of worker processes, 1 processes the files in this process
+    binned : bool
+        whether to reduce the rows in time bins, see resampleFiles
+
+    Returns
+    -------
+    list of AlchemistExport
+        the resampled exports, in the same order of the paths
 
-    error_over_time_charts_flattened(means, stdevs)
-    error_over_variance(means, stdevs)
+    """
+    if workers <= 1 or len(paths) <= 1:
+        exports, _, rows = resampleFiles(paths, timeColumnName, timeline, binned)
+        countIngested(exports, rows, timeline)
+        return exports
+    return list(iterateFiles(paths, timeColumnName, timeline, workers, binned=binned))
+
+def countIngested(exports, rows, timeline):
+    """
+    Updates the ingestion counters of the instrumentation.
+    """
+    instrumentation.count('filesParsed', len(exports))
+    instrumentation.count('rowsParsed', rows)
+    instrumentation.count('samplesResampled', len(exports) * len(timeline))
+
+def assembleRuns(data, positions, dimensions, columns, timeColumnName, timeline):
+    """
+    Lays out resampled runs in a Dataset. Each run is written at its
+    integer position in a preallocated block, all runs at once, and the
+    block is wrapped in xarray only at the end.
+
+    Parameters
+    ----------
+    data : list of ndarray
+        the resampled runs, each of shape (time x columns)
+    positions : list of tuple of int
+        for each run, its position in the grid of the dimensions
+    dimensions : dict
+        the sorted values of each coordinate, excluding time
+    columns : list of str
+        the column names of the data
+    timeColumnName : str
+        name of the time column
+    timeline : ndarray
+        the time samples
+
+    Returns
+    -------
+    xarray.Dataset
+        a dataset with one variable per non-time column, NaN where no run
+        has been provided
+
+    """
+    import xarray as xr
+    variables = [idx for idx, v in enumerate(columns) if v != timeColumnName]
+    shape = tuple(len(v) for v in dimensions.values()) + (len(timeline),)
+    block = np.full((len(variables),) + shape, np.nan)
+    if data:
+        # (variables, runs, time): each run lands on its grid cell, in a single scatter
+        values = np.stack(data)[:, :, variables].transpose(2, 0, 1)
+        offsets = tuple(np.asarray(positions, dtype=np.intp).reshape(len(data), len(dimensions)).T)
+        block[(slice(None),) + offsets] = values
+    dataset = xr.Dataset(coords={ **dimensions, timeColumnName: timeline })
+    dims = list(dimensions) + [timeColumnName]
+    for position, idx in enumerate(variables):
+        dataset[columns[idx]] = (dims, block[position])
+    return dataset
+
+class RunningMoments:
+    """
+    Count, mean, and sum of squared deviations from the mean (M2) of a
+    stream of equally shaped arrays, computed element-wise. Arrays are
+    folded in one at a time with Welford's update, and partial results can
+    be combined with the pairwise merge of Chan et al. NaN values are
+    skipped, as xarray does with skipna=True.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        shape of the arrays to aggregate
+    """
+    def __init__(self, shape):
+        self.count = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def add(self, values):
+        """
+        Folds an array in the aggregate.
+
+        Parameters
+        ----------
+        values : ndarray
+            the new observation, of the same shape of the aggregate
+        """
+        valid = ~np.isnan(values)
+        self.count += valid
+        delta = np.where(valid, values - self.mean, 0.0)
+        self.mean += np.divide(delta, self.count, out=np.zeros_like(delta), where=valid)
+        self.m2 += np.where(valid, delta * (values - self.mean), 0.0)
+
+    def merge(self, other):
+        """
+        Combines the aggregate with another one, as if all the observations
+        had been folded in this one.
+
+        Parameters
+        ----------
+        other : RunningMoments
+            the aggregate to merge, left untouched
+        """
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        weight = np.divide(other.count, count, out=np.zeros_like(count), where=count > 0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * weight
+        self.count = count
+
+    def means(self):
+        """
+        Returns
+        -------
+        ndarray
+            the mean of the observations, NaN where there was none
+        """
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    def stdevs(self, ddof=0):
+        """
+        Parameters
+        ----------
+        ddof : int
+            delta degrees of freedom, 0 like Dataset.std
+
+        Returns
+        -------
+        ndarray
+            the standard deviation of the observations, NaN where there
+            were ddof or fewer
+        """
+        valid = self.count > ddof
+        variance = np.divide(self.m2, self.count - ddof, out=np.full_like(self.m2, np.nan), where=valid)
+        return np.sqrt(variance)
+
+class QuantileSketch:
+    """
+    Mergeable sketch of the distribution of a stream of equally shaped
+    arrays, element-wise, to estimate quantiles in bounded memory.
+
+    Observations are kept in levels of at most `capacity` items, items at
+    level l standing for 2**l observations. A full level is compacted: its
+    items are sorted and every other one is promoted to the next level, with
+    an offset alternating at each compaction so that ranks are not biased.
+    The rank error is within O(log(n / capacity) / capacity) of the n
+    observations, and quantiles are exact (as numpy's linear interpolation)
+    while no more than `capacity` arrays have been added. NaN values are
+    skipped, as xarray does with skipna=True.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        shape of the arrays to aggregate
+    capacity : int
+        maximum items per level: higher is more accurate, and takes more
+        memory
+    """
+    def __init__(self, shape, capacity=128):
+        self.shape = tuple(shape)
+        self.capacity = max(2, capacity)
+        self.pending = []
+        self.levels = []
+        self.compactions = []
+
+    def add(self, values):
+        """
+        Folds an array in the sketch.
+
+        Parameters
+        ----------
+        values : ndarray
+            the new observation, of the same shape of the sketch
+        """
+        self.pending.append(np.asarray(values, dtype=float))
+        if len(self.pending) > self.capacity:
+            self.compact()
+
+    def merge(self, other):
+        """
+        Combines the sketch with another one, as if all the observations
+        had been folded in this one.
+
+        Parameters
+        ----------
+        other : QuantileSketch
+            the sketch to merge, left untouched
+        """
+        self.pending.extend(other.pending)
+        for level, items in enumerate(other.levels):
+            self.level(level)
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.compact()
+
+    def level(self, level):
+        """
+        Returns
+        -------
+        ndarray
+            the items at a level, creating the levels up to it if missing
+        """
+        while len(self.levels) <= level:
+            self.levels.append(np.empty((0,) + self.shape))
+            self.compactions.append(0)
+        return self.levels[level]
+
+    def compact(self):
+        """
+        Compacts the levels that exceed the capacity, bottom up.
+        """
+        if self.pending:
+            self.levels[:1] = [np.concatenate([self.level(0), np.stack(self.pending)])]
+            self.pending = []
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity:
+                # NaN sort last: they get promoted in proportion, and stay skipped
+                items = np.sort(items, axis=0)
+                even = len(items) - len(items) % 2
+                promoted = items[self.compactions[level] % 2:even:2]
+                self.compactions[level] += 1
+                self.levels[level] = items[even:]
+                self.level(level + 1)
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, quantiles):
+        """
+        Estimates quantiles of the observations, interpolating linearly
+        between the (weighted) items.
+
+        Parameters
+        ----------
+        quantiles : list of float
+            the quantiles to estimate, in [0, 1]
+
+        Returns
+        -------
+        ndarray
+            the estimates, of shape (quantiles, ...) where ... is the shape
+            of the sketch, NaN where there was no observation
+        """
+        self.compact()
+        items = np.concatenate(self.levels) if self.levels else np.empty((0,) + self.shape)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)] or [np.empty(0)])
+        weights = np.broadcast_to(weights.reshape((-1,) + (1,) * len(self.shape)), items.shape)
+        order = np.argsort(items, axis=0)
+        items = np.take_along_axis(items, order, axis=0)
+        weights = np.where(np.isnan(items), 0.0, np.take_along_axis(weights, order, axis=0))
+        cumulative = np.cumsum(weights, axis=0)
+        total = cumulative[-1] if len(items) else np.zeros(self.shape)
+        # Each item is centered on its ranks: with unit weights, item i sits at rank i
+        centers = np.where(weights > 0, cumulative - (weights + 1) / 2, np.inf)
+        result = np.full((len(quantiles),) + self.shape, np.nan)
+        for position, quantile in enumerate(quantiles):
+            target = quantile * (total - 1)
+            below = np.clip(np.sum(centers <= target, axis=0) - 1, 0, max(len(items) - 1, 0))
+            above = np.clip(below + 1, 0, max(len(items) - 1, 0))
+            if not len(items):
+                continue
+            low = np.take_along_axis(centers, below[None], axis=0)[0]
+            high = np.take_along_axis(centers, above[None], axis=0)[0]
+            lowValue = np.take_along_axis(items, below[None], axis=0)[0]
+            highValue = np.take_along_axis(items, above[None], axis=0)[0]
+            fraction = np.clip(np.divide(target - low, high - low, out=np.zeros(self.shape), where=np.isfinite(high) & (high > low)), 0, 1)
+            result[position] = np.where(total > 0, lowValue + (highValue - lowValue) * fraction, np.nan)
+        return result
+
+def aggregateStreaming(paths, timeColumnName, timeline, seedVars, workers=1, chunkSize=256, edges=None, statistic='mean', quantiles=(), capacity=128):
+    """
+    Computes the mean, standard deviation, and (optionally) quantiles over
+    the seeds of resampled Alchemist exports in a single pass: each run is
+    folded in the moments and in the QuantileSketch of its cell as soon as
+    it is read, then discarded, so that memory does not grow with the
+    number of seeds.
+
+    Parameters
+    ----------
+    paths : list of str
+        paths to the target files
+    timeColumnName : str
+        name of the time column
+    timeline : ndarray
+        the time samples
+    seedVars : list of str
+        the variables to aggregate over
+    workers : int
+        number of worker processes used to read the files
+    chunkSize : int
+        maximum number of files held in memory by each worker
+    edges : ndarray
+        the edges of the time bins to reduce the rows in, centered on the
+        timeline; runs are resampled at the closest rows if None
+    statistic : str
+        the statistic of each time bin to aggregate, see binStatistic
+    quantiles : list of float
+        the quantiles to estimate, none if empty
+    capacity : int
+        the capacity of the quantile sketches
+
+    Returns
+    -------
+    tuple of xarray.Dataset
+        the means, the standard deviations, and the quantiles (empty if
+        none has been requested)
+
+    """
+    cells, sketches, names, columns = foldRuns(paths, timeColumnName, timeline, seedVars, workers, chunkSize, edges, statistic, quantiles, capacity)
+    means, stdevs = momentsToDatasets(cells, names, columns, timeColumnName, timeline)
+    return means, stdevs, sketchesToDataset(sketches, quantiles, names, columns, timeColumnName, timeline)
+
+def foldRuns(paths, timeColumnName, timeline, seedVars, workers=1, chunkSize=256, edges=None, statistic='mean', quantiles=(), capacity=128):
+    """
+    Reads resampled Alchemist exports, folding each of them in the moments
+    (and quantile sketches) of its cell, in the order of the paths. See
+    aggregateStreaming for the parameters.
+
+    Returns
+    -------
+    tuple
+        The RunningMoments and the QuantileSketch (if quantiles have been
+        requested) of each cell, by sorted tuple of (coordinate name, value)
+        pairs; the coordinate names; and the column names
+
+    """
+    cells = {}
+    sketches = {}
+    names = {}
+    columns = []
+    binned = edges is not None
+    for export in iterateFiles(paths, timeColumnName, edges if binned else timeline, workers, chunkSize, binned):
+        if binned:
+            export = export._replace(data=binStatistic(export.data, statistic, export.columns.index(timeColumnName), timeline))
+        coordinates = { name: value for name, value in export.variables.items() if name not in seedVars }
+        names.update(dict.fromkeys(coordinates))
+        columns = columns or export.columns
+        key = tuple(sorted(coordinates.items()))
+        if key not in cells:
+            cells[key] = RunningMoments(export.data.shape)
+            if quantiles:
+                sketches[key] = QuantileSketch(export.data.shape, capacity)
+        cells[key].add(export.data)
+        if quantiles:
+            sketches[key].add(export.data)
+    return cells, sketches, list(names), columns
+
+def seedsConverged(moments, confidence, tolerance):
+    """
+    Parameters
+    ----------
+    moments : RunningMoments
+        the moments of a cell, of shape (time x columns)
+    confidence : float
+        the confidence level of the interval of the mean, e.g. 0.95
+    tolerance : float
+        the largest half width of the interval, relative to the mean
+        absolute value of each column over time
+
+    Returns
+    -------
+    bool
+        whether the confidence interval of the mean of every column is
+        narrower than the tolerance at every time (normal approximation)
+    """
+    import statistics
+    import warnings
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    with warnings.catch_warnings():
+        # Columns without any value (e.g. not exported yet) never converge
+        warnings.simplefilter('ignore', RuntimeWarning)
+        halfWidths = np.nanmax(z * moments.stdevs(ddof=1) / np.sqrt(moments.count), axis=0)
+        scales = np.nanmean(np.abs(moments.means()), axis=0)
+    return bool(np.all(halfWidths <= tolerance * scales))
+
+def aggregateAdaptive(cellPaths, timeColumnName, timeline, seedVars, workers=1, edges=None, statistic='mean', quantiles=(), capacity=128, tolerance=0.05, confidence=0.95, minSeeds=10):
+    """
+    Computes the mean, standard deviation, and (optionally) quantiles over
+    the seeds as aggregateStreaming, but reads the seeds of each cell a few
+    at a time, and stops as soon as the mean has converged (see
+    seedsConverged). Each round reads the next seeds of all the cells that
+    have not converged yet, so that files are still read in parallel.
+
+    Parameters
+    ----------
+    cellPaths : dict
+        the paths of the files of each cell, in the order they are read, by
+        sorted tuple of (coordinate name, value) pairs
+    tolerance : float
+        the largest half width of the confidence interval of the mean,
+        relative to the mean absolute value of each variable
+    confidence : float
+        the confidence level of the interval
+    minSeeds : int
+        the seeds read per cell at each round, hence at least
+
+    See aggregateStreaming for the other parameters.
+
+    Returns
+    -------
+    tuple of xarray.Dataset
+        the means, the standard deviations, the quantiles (empty if none
+        has been requested), and the seeds read in each cell ('seeds'), out
+        of those available ('available'), and whether it converged
+        ('converged', 1 or 0)
+    """
+    import xarray as xr
+    cells, sketches, names, columns = {}, {}, {}, []
+    read = dict.fromkeys(cellPaths, 0)
+    converged = dict.fromkeys(cellPaths, False)
+    pending = list(cellPaths)
+    while pending:
+        batch = [path for key in pending for path in cellPaths[key][read[key]:read[key] + minSeeds]]
+        roundCells, roundSketches, roundNames, roundColumns = foldRuns(
+            batch, timeColumnName, timeline, seedVars, workers, edges=edges, statistic=statistic, quantiles=quantiles, capacity=capacity,
+        )
+        names.update(dict.fromkeys(roundNames))
+        columns = columns or roundColumns
+        for key, moments in roundCells.items():
+            if key in cells:
+                cells[key].merge(moments)
+            else:
+                cells[key] = moments
+        for key, sketch in roundSketches.items():
+            if key in sketches:
+                sketches[key].merge(sketch)
+            else:
+                sketches[key] = sketch
+        for key in pending:
+            read[key] = min(read[key] + minSeeds, len(cellPaths[key]))
+            converged[key] = key in cells and seedsConverged(cells[key], confidence, tolerance)
+        pending = [key for key in pending if not converged[key] and read[key] < len(cellPaths[key])]
+    names = list(names)
+    means, stdevs = momentsToDatasets(cells, names, columns, timeColumnName, timeline)
+    # The seeds needed by each cell, laid out as the other datasets (without time)
+    seeds = xr.Dataset()
+    dimensions = { name: sorted({ dict(key)[name] for key in cellPaths }) for name in names }
+    for name, values in dimensions.items():
+        seeds.coords[name] = values
+    shape = tuple(len(values) for values in dimensions.values())
+    counts = { variable: np.full(shape, np.nan) for variable in ['seeds', 'available', 'converged'] }
+    for key in cellPaths:
+        coordinates = dict(key)
+        position = tuple(dimensions[name].index(coordinates[name]) for name in names)
+        counts['seeds'][position] = read[key]
+        counts['available'][position] = len(cellPaths[key])
+        counts['converged'][position] = converged[key]
+    for variable, values in counts.items():
+        seeds[variable] = (names, values)
+    return means, stdevs, sketchesToDataset(sketches, quantiles, names, columns, timeColumnName, timeline), seeds
+
+def seedOrder(paths, key, seed=0):
+    """
+    Returns
+    -------
+    list of str
+        the paths of the files of a cell in a random order, always the
+        same for the same cell and seed
+    """
+    import hashlib
+    rng = np.random.default_rng([seed, int.from_bytes(hashlib.blake2b(repr(key).encode(), digest_size=8).digest(), 'little')])
+    return [paths[position] for position in rng.permutation(len(paths))]
+
+def momentsToDatasets(cells, names, columns, timeColumnName, timeline):
+    """
+    Lays out per-cell moments as the mean and standard deviation Datasets.
+
+    Parameters
+    ----------
+    cells : dict
+        RunningMoments of shape (time x columns), by sorted tuple of
+        (coordinate name, value) pairs
+    names : list of str
+        the coordinate names, in the order of the dimensions
+    columns : list of str
+        the column names of the data
+    timeColumnName : str
+        name of the time column
+    timeline : ndarray
+        the time samples
+
+    Returns
+    -------
+    tuple of xarray.Dataset
+        the means and the standard deviations
+
+    """
+    import xarray as xr
+    dimensions = { name: sorted({ dict(key)[name] for key in cells }) for name in names }
+    shape = tuple(len(values) for values in dimensions.values()) + (len(timeline),)
+    means = xr.Dataset()
+    stdevs = xr.Dataset()
+    for dataset in (means, stdevs):
+        for name, values in dimensions.items():
+            dataset.coords[name] = values
+        dataset.coords[timeColumnName] = timeline
+    statistics = { v: (np.full(shape, np.nan), np.full(shape, np.nan)) for v in columns if v != timeColumnName }
+    for key, moments in cells.items():
+        coordinates = dict(key)
+        position = tuple(dimensions[name].index(coordinates[name]) for name in names)
+        cellMeans = moments.means()
+        cellStdevs = moments.stdevs()
+        for idx, v in enumerate(columns):
+            if v in statistics:
+                statistics[v][0][position] = cellMeans[:, idx]
+                statistics[v][1][position] = cellStdevs[:, idx]
+    dims = names + [timeColumnName]
+    for v, (meanValues, stdevValues) in statistics.items():
+        means[v] = (dims, meanValues)
+        stdevs[v] = (dims, stdevValues)
+    return means, stdevs
+
+def sketchesToDataset(sketches, quantiles, names, columns, timeColumnName, timeline):
+    """
+    Lays out per-cell quantile sketches as a Dataset, with the quantiles as
+    the first dimension (as Dataset.quantile).
+
+    Parameters
+    ----------
+    sketches : dict
+        QuantileSketch of shape (time x columns), by sorted tuple of
+        (coordinate name, value) pairs
+    quantiles : list of float
+        the quantiles to estimate
+    names : list of str
+        the coordinate names, in the order of the dimensions
+    columns : list of str
+        the column names of the data
+    timeColumnName : str
+        name of the time column
+    timeline : ndarray
+        the time samples
+
+    Returns
+    -------
+    xarray.Dataset
+        the quantiles, empty if there is no sketch
+
+    """
+    import xarray as xr
+    result = xr.Dataset()
+    if not sketches:
+        return result
+    dimensions = { name: sorted({ dict(key)[name] for key in sketches }) for name in names }
+    result.coords['quantile'] = list(quantiles)
+    for name, values in dimensions.items():
+        result.coords[name] = values
+    result.coords[timeColumnName] = timeline
+    shape = (len(quantiles),) + tuple(len(values) for values in dimensions.values()) + (len(timeline),)
+    estimates = { v: np.full(shape, np.nan) for v in columns if v != timeColumnName }
+    for key, sketch in sketches.items():
+        coordinates = dict(key)
+        position = (slice(None),) + tuple(dimensions[name].index(coordinates[name]) for name in names)
+        cellQuantiles = sketch.quantiles(quantiles)
+        for idx, v in enumerate(columns):
+            if v in estimates:
+                estimates[v][position] = cellQuantiles[:, :, idx]
+    for v, values in estimates.items():
+        result[v] = (['quantile'] + names + [timeColumnName], values)
+    return result
+
+def timePyramid(dataset, timeColumnName, levels):
+    """
+    Builds the coarser levels of a dataset along time: level k merges 2^k
+    samples of the dataset into their mean, minimum, and maximum, along a
+    new leading 'envelope' dimension. Times are the mean of merged times.
+
+    Parameters
+    ----------
+    dataset : xarray.Dataset
+        the dataset at full resolution
+    timeColumnName : str
+        name of the time dimension
+    levels : int
+        number of levels to build
+
+    Returns
+    -------
+    list of xarray.Dataset
+        the levels, from 1 (half the samples) to levels; empty datasets if
+        the dataset has no data along time
+    """
+    import xarray as xr
+    result = []
+    for level in range(1, levels + 1):
+        pyramid = xr.Dataset()
+        if dataset.data_vars and timeColumnName in dataset.dims:
+            factor = 2 ** level
+            pyramid.coords['envelope'] = ['mean', 'min', 'max']
+            for name in dataset.coords:
+                if name != timeColumnName:
+                    pyramid.coords[name] = dataset[name].values
+            pyramid.coords[timeColumnName] = coarsenSamples(dataset[timeColumnName].values, 0, factor)[0]
+            for name, variable in dataset.data_vars.items():
+                if timeColumnName in variable.dims:
+                    envelope = coarsenSamples(variable.values, variable.dims.index(timeColumnName), factor)
+                    pyramid[name] = (['envelope'] + list(variable.dims), np.stack(envelope))
+        result.append(pyramid)
+    return result
+
+def fileNameCoordinates(name):
+    """
+    Parses the coordinates encoded in the name of an Alchemist export, such
+    as '1-exported-data_agentFrequency-1.0_speed-1.0_seed-0.0.csv' (or
+    with the suffix of a compressed export).
+
+    Parameters
+    ----------
+    name : str
+        the file name, without directory
+
+    Returns
+    -------
+    dict or None
+        The typed coordinates, or None if the name does not follow the
+        experiment_name-value_name-value pattern
+
+    """
+    parts = name[:len(name) - len(exportSuffix(name) or '')].split('_')[1:]
+    result = {}
+    for part in parts:
+        match = re.fullmatch(r'(?P<varName>[a-zA-Z.]+)-(?P<varValue>.+)', part)
+        if not match:
+            return None
+        result[match['varName']] = parseValue(match['varValue'].replace('Infinity', '1e30000'))
+    return result or None
+
+class CoordinateIndex:
+    """
+    Persistent index of the Alchemist exports in a data directory, mapping
+    each file to its typed coordinates. Files are checked by size and
+    modification time, so that refreshing the index only reads the headers
+    of new or changed files.
+
+    Parameters
+    ----------
+    directory : str
+        where to find Alchemist data files
+    entries : dict
+        by file name: size, mtime, and coordinates
+    source : str
+        'header' to read coordinates from the file headers, 'filename' to
+        parse them from the file names (falling back to the header)
+    """
+    def __init__(self, directory, entries=None, source='header'):
+        self.directory = directory
+        self.entries = entries or {}
+        self.source = source
+
+    @staticmethod
+    def open(directory, path=None, source='header'):
+        """
+        Loads the index from disk, if any, brings it up to date with the
+        content of the directory, and stores it back.
+
+        Parameters
+        ----------
+        directory : str
+            where to find Alchemist data files
+        path : str
+            where the index is persisted, no persistence if None
+        source : str
+            where to read the coordinates from, see CoordinateIndex
+
+        Returns
+        -------
+        CoordinateIndex
+            the updated index
+        """
+        import json
+        entries = {}
+        if path is not None and os.path.exists(path):
+            with open(path, 'r') as file:
+                stored = json.load(file)
+            if stored.get('directory') == directory and stored.get('source') == source:
+                entries = stored['entries']
+        index = CoordinateIndex(directory, entries, source)
+        if index.refresh() and path is not None:
+            with open(path, 'w') as file:
+                json.dump({'directory': directory, 'source': source, 'entries': index.entries}, file)
+        return index
+
+    def refresh(self):
+        """
+        Indexes new or changed files, and forgets deleted ones.
+
+        Returns
+        -------
+        bool
+            True if the index changed
+        """
+        names = sorted(name for name in os.listdir(self.directory) if exportSuffix(name))
+        instrumentation.count('filesScanned', len(names))
+        changed = len(self.entries.keys() - set(names)) > 0
+        entries = {}
+        for name in names:
+            signature = fileSignature(self.directory + '/' + name)
+            entry = self.entries.get(name)
+            if entry is None or entry['size'] != signature['size'] or entry['mtime'] != signature['mtime']:
+                entry = {'size': signature['size'], 'mtime': signature['mtime'], 'coordinates': self.readCoordinates(name)}
+                instrumentation.count('headersRead')
+                changed = True
+            entries[name] = entry
+        self.entries = entries
+        return changed
+
+    def readCoordinates(self, name):
+        """
+        Returns
+        -------
+        dict
+            the coordinates of a file, read from its name or its header
+        """
+        coordinates = fileNameCoordinates(name) if self.source == 'filename' else None
+        return coordinates if coordinates is not None else extractCoordinates(self.directory + '/' + name) or {}
+
+    def files(self, experiment):
+        """
+        Returns
+        -------
+        list of str
+            the sorted paths of the exports of an experiment; if an export
+            is available both plain and compressed, the plain one (or the
+            first compressed one in exportCodecs)
+        """
+        import fnmatch
+        chosen = {}
+        for name in self.entries:
+            suffix = exportSuffix(name)
+            if suffix and fnmatch.fnmatch(name, experiment + '_*' + suffix):
+                stem = name[:-len(suffix)]
+                if stem not in chosen or list(exportCodecs).index(suffix) < list(exportCodecs).index(exportSuffix(chosen[stem])):
+                    chosen[stem] = name
+        return [self.directory + '/' + name for name in sorted(chosen.values())]
+
+    def coordinates(self, path):
+        """
+        Returns
+        -------
+        dict
+            the typed coordinates of a file
+        """
+        return self.entries[os.path.basename(path)]['coordinates']
+
+    def signatures(self, paths):
+        """
+        Returns
+        -------
+        dict
+            by path, the signature of the file when it was last indexed
+        """
+        return {
+            path: {'size': entry['size'], 'mtime': entry['mtime'], 'hash': None}
+            for path in paths
+            for entry in [self.entries[os.path.basename(path)]]
+        }
+
+    def dimensions(self, experiment, exclude=()):
+        """
+        Returns
+        -------
+        dict
+            the sorted values of each coordinate of an experiment, in the
+            order the coordinates appear in the files
+        """
+        values = {}
+        for path in self.files(experiment):
+            for name, value in self.coordinates(path).items():
+                if name not in exclude:
+                    values.setdefault(name, set()).add(value)
+        return { name: sorted(v) for name, v in values.items() }
+
+    def positions(self, experiment, dimensions=None):
+        """
+        Parameters
+        ----------
+        experiment : str
+            name of the experiment
+        dimensions : dict
+            the grid, by default the one of the experiment
+
+        Returns
+        -------
+        dict
+            by path, the tuple of the integer positions of the file in the
+            grid, in the order of the dimensions
+        """
+        dimensions = dimensions if dimensions is not None else self.dimensions(experiment)
+        lookup = { name: { value: position for position, value in enumerate(values) } for name, values in dimensions.items() }
+        return {
+            path: tuple(lookup[name][coordinates[name]] for name in dimensions)
+            for path in self.files(experiment)
+            for coordinates in [self.coordinates(path)]
+        }
+
+    def select(self, experiment, **selection):
+        """
+        Finds the exports matching a selection, such as
+        select('1-exported-data', agentFrequency=1.0, variance=[0.0, 0.5]).
+
+        Returns
+        -------
+        list of str
+            the paths of the matching files
+        """
+        def matches(coordinates):
+            return all(
+                coordinates.get(name) in (wanted if isinstance(wanted, (list, tuple, set)) else [wanted])
+                for name, wanted in selection.items()
+            )
+        return [path for path in self.files(experiment) if matches(self.coordinates(path))]
+
+def fileSignature(path, hashContent=False):
+    """
+    Describes the current state of a file, to detect whether it changed.
+
+    Parameters
+    ----------
+    path : str
+        path to the target file
+    hashContent : bool
+        whether to also compute a digest of the file content
+
+    Returns
+    -------
+    dict
+        size (bytes), mtime (nanoseconds), and hash (hex digest, or None)
+
+    """
+    stat = os.stat(path)
+    digest = None
+    if hashContent:
+        import hashlib
+        with open(path, 'rb') as file:
+            digest = hashlib.blake2b(file.read()).hexdigest()
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': digest}
+
+def isUnchanged(path, cached, hashContent=False, current=None):
+    """
+    Checks whether a file still matches its cached signature. Size and
+    modification time are checked first; if the latter differs and content
+    hashing is enabled, a file with the same content is still a match.
+
+    Parameters
+    ----------
+    path : str
+        path to the target file
+    cached : dict
+        the signature stored in the cache, as returned by fileSignature
+    hashContent : bool
+        whether to fall back to comparing the content digests
+    current : dict
+        the current signature of the file without digest, if already known
+
+    Returns
+    -------
+    bool
+        True if the cached data of the file can be reused
+
+    """
+    current = current or fileSignature(path)
+    if current['size'] != cached['size']:
+        return False
+    if current['mtime'] == cached['mtime']:
+        return True
+    return hashContent and cached['hash'] is not None and fileSignature(path, True)['hash'] == cached['hash']
+
+def loadIngestCache(path, parameters):
+    """
+    Loads the per-file ingestion cache, discarding it entirely if it has
+    been produced with different processing parameters.
+
+    Parameters
+    ----------
+    path : str
+        path of the cache file
+    parameters : dict
+        the parameters affecting the resampled data (time samples, bounds...)
+
+    Returns
+    -------
+    dict
+        For each experiment, a dict with the timeline and the cached runs
+
+    """
+    try:
+        with open(path, 'rb') as file:
+            cache = pickle.load(file)
+    except Exception:
+        return {}
+    return cache['experiments'] if cache.get('parameters') == parameters else {}
+
+def saveIngestCache(path, parameters, experiments):
+    """
+    Stores the per-file ingestion cache.
+
+    Parameters
+    ----------
+    path : str
+        path of the cache file
+    parameters : dict
+        the parameters the data has been resampled with
+    experiments : dict
+        For each experiment, a dict with the timeline and the cached runs
+
+    """
+    with open(path, 'wb') as file:
+        pickle.dump({'parameters': parameters, 'experiments': experiments}, file, protocol=-1)
+
+def refreshManifest(cached, paths, timeline, hashContent=False, signatures=None):
+    """
+    Compares the cached runs of an experiment with the files currently
+    available.
+
+    Parameters
+    ----------
+    cached : dict
+        the cache entry of the experiment (timeline and runs), possibly empty
+    paths : list of str
+        paths to the files currently available
+    timeline : ndarray
+        the time samples, all runs are stale if they differ from the cached
+    hashContent : bool
+        whether to compare content digests of touched files
+    signatures : dict
+        current signatures (without digest) by path, e.g. from a
+        CoordinateIndex, to avoid checking the files again
+
+    Returns
+    -------
+    tuple
+        The cached runs that are still valid, by path, and the list of the
+        paths that are new or changed
+
+    """
+    runs = cached.get('runs', {}) if np.array_equal(cached.get('timeline'), timeline) else {}
+    signatures = signatures or {}
+    valid = {}
+    stale = []
+    for path in paths:
+        current = signatures.get(path) or fileSignature(path)
+        if path in runs and isUnchanged(path, runs[path]['signature'], hashContent, current):
+            valid[path] = runs[path]
+            instrumentation.count('cacheHits')
+            mtime = current['mtime']
+            if mtime != runs[path]['signature']['mtime']:
+                # Same content, touched: remember the new modification time
+                valid[path] = dict(runs[path], signature=dict(runs[path]['signature'], mtime=mtime))
+        else:
+            stale.append(path)
+            instrumentation.count('cacheMisses')
+    return valid, stale
+
+def ingestFilesCached(cached, paths, timeColumnName, timeline, workers=1, hashContent=False, signatures=None, binned=False):
+    """
+    Brings the cached runs of an experiment up to date: files that are new
+    or changed since they were cached get read and resampled, runs of
+    deleted files are dropped, and the others are reused as they are.
+
+    Parameters
+    ----------
+    cached : dict
+        the cache entry of the experiment (timeline and runs), possibly empty
+    paths : list of str
+        paths to the files currently available
+    timeColumnName : str
+        name of the time column
+    timeline : ndarray
+        the time samples
+    workers : int
+        number of worker processes used to read the changed files
+    hashContent : bool
+        whether to store and compare content digests
+    signatures : dict
+        current signatures of the files, if already known
+    binned : bool
+        whether to reduce the rows in time bins, see resampleFiles
+
+    Returns
+    -------
+    tuple
+        The updated cache entry, and the number of files read
+
+    """
+    runs, stale = refreshManifest(cached, paths, timeline, hashContent, signatures)
+    for path, export in zip(stale, ingestFiles(stale, timeColumnName, timeline, workers, binned)):
+        runs[path] = {
+            'signature': fileSignature(path, hashContent),
+            'data': export.data,
+            'variables': export.variables,
+            'columns': export.columns,
+        }
+    return {'timeline': timeline, 'runs': { path: runs[path] for path in paths }}, len(stale)
+
+def writeSummaryStore(directory, experiment, datasets):
+    """
+    Writes the datasets of an experiment in the summary store: one dense
+    .npy array per kind of dataset and variable, plus a JSON sidecar with
+    the dimensions and coordinates. Every write goes to new files, renamed
+    into place, and the sidecar is replaced last: readers that memory map
+    the arrays of the previous write keep reading them unchanged, and the
+    files of the previous write are kept until the next one.
+
+    Parameters
+    ----------
+    directory : str
+        root directory of the store
+    experiment : str
+        name of the experiment
+    datasets : dict
+        the datasets to store, by kind (e.g., 'mean', 'std', 'runs'), with
+        their attributes if JSON serializable
+
+    """
+    import json
+    target = Path(directory) / experiment
+    target.mkdir(parents=True, exist_ok=True)
+    previous = set()
+    try:
+        with open(target / 'metadata.json', 'r') as file:
+            previous = { variable['file'] for description in json.load(file).values() for variable in description['variables'].values() }
+    except (OSError, ValueError):
+        pass
+    # A fresh name for each write, so that the arrays a reader has mapped are never overwritten
+    version = f'{time.time_ns():x}'
+    metadata = {}
+    for kind, dataset in datasets.items():
+        variables = {}
+        for index, name in enumerate(dataset.data_vars):
+            variables[name] = {'file': f'{kind}-{index}-{version}.npy', 'dims': list(dataset[name].dims)}
+            with open(target / (variables[name]['file'] + '.tmp'), 'wb') as file:
+                np.save(file, np.ascontiguousarray(dataset[name].values))
+            os.replace(target / (variables[name]['file'] + '.tmp'), target / variables[name]['file'])
+        metadata[kind] = {
+            'coords': {name: dataset[name].values.tolist() for name in dataset.coords},
+            'variables': variables,
+            'attrs': dict(dataset.attrs),
+        }
+    # The sidecar is replaced last: a store without it is incomplete
+    with open(target / 'metadata.json.tmp', 'w') as file:
+        json.dump(metadata, file)
+    os.replace(target / 'metadata.json.tmp', target / 'metadata.json')
+    # Only the arrays of this write and of the previous one (possibly still being read) are kept
+    current = { variable['file'] for description in metadata.values() for variable in description['variables'].values() }
+    for path in target.glob('*.npy'):
+        if path.name not in current | previous:
+            path.unlink()
+
+def openSummaryStore(directory, experiment, kinds=None):
+    """
+    Opens the datasets of an experiment from the summary store. The arrays
+    are memory mapped, so that only the selected slices get read from disk.
+
+    Parameters
+    ----------
+    directory : str
+        root directory of the store
+    experiment : str
+        name of the experiment
+    kinds : list of str
+        the kinds of dataset to open, all of them if None
+
+    Returns
+    -------
+    dict
+        the datasets, by kind
+
+    Raises
+    ------
+    FileNotFoundError
+        if the experiment has not been stored
+
+    """
+    import xarray as xr
+    import json
+    source = Path(directory) / experiment
+    with open(source / 'metadata.json', 'r') as file:
+        metadata = json.load(file)
+    result = {}
+    for kind in metadata if kinds is None else kinds:
+        description = metadata[kind]
+        dataset = xr.Dataset(coords={name: values for name, values in description['coords'].items()})
+        for name, variable in description['variables'].items():
+            dataset[name] = (variable['dims'], np.load(source / variable['file'], mmap_mode='r'))
+        dataset.attrs.update(description.get('attrs', {}))
+        result[kind] = dataset
+    return result
+
+def pyramidKind(kind, level):
+    """
+    Returns
+    -------
+    str
+        the kind of dataset in the summary store of a level of the time
+        pyramid of another kind, the kind itself for level 0
+    """
+    return kind if level == 0 else f'{kind}-level{level}'
+
+def withTimePyramid(datasets, timeColumnName, levels):
+    """
+    Adds the levels of the time pyramid of the means, standard deviations,
+    and quantiles to the datasets to store.
+
+    Parameters
+    ----------
+    datasets : dict
+        the datasets to store, by kind
+    timeColumnName : str
+        name of the time dimension
+    levels : int
+        number of levels, see timePyramid
+
+    Returns
+    -------
+    dict
+        the datasets and their levels, by kind
+    """
+    result = dict(datasets)
+    for kind in ['mean', 'std', 'quantiles']:
+        if kind in datasets:
+            for level, dataset in enumerate(timePyramid(datasets[kind], timeColumnName, levels), 1):
+                result[pyramidKind(kind, level)] = dataset
+    return result
+
+def beautifyValue(v):
+    """
+    Converts an object to a better version for printing, in particular:
+        - if the object converts to float, then its float value is used
+        - if the object can be rounded to int, then the int value is preferred
+
+    Parameters
+    ----------
+    v : object
+        the object to try to beautify
+
+    Returns
+    -------
+    object or float or int
+        the beautified value
+    """
+    try:
+        v = float(v)
+        if v.is_integer():
+            return int(v)
+        return v
+    except:
+        return v
+
+class MarginalLattice:
+    """
+    The marginals of a Dataset, as in a data cube: the means (skipping NaN)
+    over each subset of its dimensions, computed once and memoized. Each
+    marginal is derived from the smallest marginal already computed that
+    reduces a subset of its dimensions, rather than from the full Dataset.
+    Sums and counts are kept, so that deriving is exact even with NaN.
+
+    Parameters
+    ----------
+    dataset : xarray.Dataset
+        the full Dataset, i.e., the marginal reducing no dimension
+    capacity : int
+        maximum number of memoized marginals, the least recently used get
+        evicted first (the full Dataset, and its sums and counts, are always
+        kept)
+    """
+    def __init__(self, dataset, capacity=64):
+        self.dataset = dataset
+        self.capacity = capacity
+        self.views = collections.OrderedDict()
+        self.root = None
+
+    def size(self, reduced):
+        """
+        Returns
+        -------
+        int
+            the number of elements per variable of a marginal
+        """
+        return int(np.prod([size for dim, size in self.dataset.sizes.items() if dim not in reduced]))
+
+    def parts(self, reduced):
+        """
+        Returns
+        -------
+        tuple of xarray.Dataset
+            the sums and the counts of the values other than NaN of a
+            memoized marginal, or of the full Dataset
+        """
+        if reduced:
+            return self.views[reduced][:2]
+        if self.root is None:
+            # Computed once, on the first marginal derived from the full Dataset
+            self.root = (self.dataset.fillna(0), self.dataset.notnull().astype(float))
+        return self.root
+
+    def marginal(self, dims):
+        """
+        Computes the mean over some dimensions, skipping NaN, as
+        Dataset.mean(dim=dims, skipna=True).
+
+        Parameters
+        ----------
+        dims : iterable of str
+            the dimensions to reduce
+
+        Returns
+        -------
+        xarray.Dataset
+            the marginal
+        """
+        reduced = frozenset(dims)
+        if not reduced:
+            return self.dataset
+        if reduced in self.views:
+            self.views.move_to_end(reduced)
+            instrumentation.count('marginalHits')
+            return self.views[reduced][2]
+        parent = min([key for key in self.views if key < reduced] + [frozenset()], key=self.size)
+        sums, counts = self.parts(parent)
+        remaining = sorted(reduced - parent)
+        sums, counts = sums.sum(dim=remaining), counts.sum(dim=remaining)
+        self.views[reduced] = (sums, counts, sums / counts.where(counts > 0))
+        instrumentation.count('marginalsComputed')
+        if len(self.views) > self.capacity:
+            self.views.popitem(last=False)
+        return self.views[reduced][2]
+
+ChartSpec = collections.namedtuple('ChartSpec', ['renderer', 'output', 'arguments'])
+
+def chartFingerprint(spec):
+    """
+    Hashes everything a chart depends on: the data and the parameters it
+    is drawn from, and the code of the functions drawing it.
+
+    Parameters
+    ----------
+    spec : ChartSpec
+        the chart to fingerprint
+
+    Returns
+    -------
+    str
+        hex digest, equal for charts that would render the same
+
+    """
+    import hashlib
+    import inspect
+    import xarray as xr
+    digest = hashlib.blake2b()
+    def feed(value):
+        if isinstance(value, (xr.Dataset, xr.DataArray)):
+            variables = value.variables if isinstance(value, xr.Dataset) else {value.name: value.variable, **value.coords}
+            for name in sorted(variables, key=str):
+                feed(str(name))
+                feed(tuple(variables[name].dims))
+                feed(np.asarray(variables[name].values))
+        elif isinstance(value, np.ndarray):
+            digest.update(f'{value.dtype}{value.shape}'.encode())
+            digest.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode())
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                feed(key)
+                feed(item)
+        elif isinstance(value, (list, tuple)):
+            digest.update(f'{type(value).__name__}{len(value)}'.encode())
+            for item in value:
+                feed(item)
+        else:
+            digest.update(repr(value).encode())
+    # The drawing code: the renderer and the module functions it uses, transitively
+    pending = [renderChart, spec.renderer]
+    seen = set()
+    while pending:
+        function = pending.pop()
+        if function.__name__ not in seen:
+            seen.add(function.__name__)
+            digest.update(inspect.getsource(function).encode())
+            pending.extend(
+                candidate for name in function.__code__.co_names
+                for candidate in [globals().get(name)]
+                if inspect.isfunction(candidate) and candidate.__module__ == function.__module__
+            )
+    feed(spec.output)
+    feed(spec.arguments)
+    return digest.hexdigest()
+
+def renderChart(spec):
+    """
+    Draws a chart and saves it, using a non-interactive backend. This is
+    what the worker processes run when rendering in parallel.
+
+    Parameters
+    ----------
+    spec : ChartSpec
+        the chart to draw
+
+    Returns
+    -------
+    str
+        the path of the saved chart
+
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    matplotlib.rcParams.update({'axes.titlesize': 12})
+    matplotlib.rcParams.update({'axes.labelsize': 10})
+    Path(spec.output).parent.mkdir(parents=True, exist_ok=True)
+    spec.renderer(spec.output, **spec.arguments)
+    return spec.output
+
+def renderCharts(specs, workers=1, manifest=None):
+    """
+    Renders the charts whose data or drawing code changed since they were
+    last saved, skipping the others, serially or with a pool of worker
+    processes.
+
+    Parameters
+    ----------
+    specs : list of ChartSpec
+        all the charts that should exist
+    workers : int
+        number of worker processes, 1 renders in this process
+    manifest : str
+        path of the JSON file recording the fingerprint of each saved chart,
+        no chart is skipped if None
+
+    Returns
+    -------
+    tuple of int
+        the number of rendered and skipped charts
+
+    """
+    import json
+    fingerprints = {}
+    if manifest is not None and os.path.exists(manifest):
+        with open(manifest, 'r') as file:
+            fingerprints = json.load(file)
+    pending = []
+    for spec in specs:
+        fingerprint = chartFingerprint(spec)
+        if not os.path.exists(spec.output) or fingerprints.get(spec.output) != fingerprint:
+            pending.append(spec)
+        fingerprints[spec.output] = fingerprint
+    if workers > 1 and len(pending) > 1:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(renderChart, pending))
+    else:
+        for spec in pending:
+            renderChart(spec)
+    if manifest is not None:
+        Path(manifest).parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest, 'w') as file:
+            json.dump(fingerprints, file, indent=1)
+    instrumentation.count('chartsRendered', len(pending))
+    instrumentation.count('chartsSkipped', len(specs) - len(pending))
+    print(f'Rendered {len(pending)} charts, {len(specs) - len(pending)} up to date')
+    return len(pending), len(specs) - len(pending)
+
+def make_line_chart(
+    xdata,
+    ydata,
+    title=None,
+    ylabel=None,
+    xlabel=None,
+    colors=None,
+    linewidth=1,
+    error_alpha=0.2,
+    figure_size=(6, 4)
+):
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize = figure_size)
+    ax = fig.add_subplot(1, 1, 1)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+#    ax.set_ylim(0)
+#    ax.set_xlim(min(xdata), max(xdata))
+    index = 0
+    for (label, (data, error)) in ydata.items():
+#        print(f'plotting {data}\nagainst {xdata}')
+        lines = ax.plot(xdata, data, label=label, color=colors(index / (len(ydata) - 1)) if colors else None, linewidth=linewidth)
+        index += 1
+        if error is not None:
+            last_color = lines[-1].get_color()
+            ax.fill_between(
+                xdata,
+                data+error,
+                data-error,
+                facecolor=last_color,
+                alpha=error_alpha,
+            )
+    return (fig, ax)
+
+def render_line_chart(output, xlim, **chart):
+    import matplotlib.pyplot as plt
+    fig, ax = make_line_chart(**chart)
+    ax.set_xlim(*xlim)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+
+def generate_all_charts(means, errors, output_directory, timeColumnName, label_for, unit_for, xlim, basedir=''):
+    """
+    Enumerates a line chart over time for each comparison variable,
+    coordinate, coordinate value, metric, with and without errors. The
+    means and errors are MarginalLattice, so that each view is reduced once.
+
+    Returns
+    -------
+    list of ChartSpec
+        the charts, to be drawn by renderCharts
+    """
+    specs = []
+    viable_coords = { coord for coord in means.dataset.coords if means.dataset[coord].size > 1 }
+    for comparison_variable in viable_coords - {timeColumnName}:
+        mergeable_variables = viable_coords - {timeColumnName, comparison_variable}
+        for current_coordinate in mergeable_variables:
+            merge_variables = mergeable_variables - { current_coordinate }
+            merge_data_view = means.marginal(merge_variables)
+            merge_error_view = errors.marginal(merge_variables)
+            for current_coordinate_value in merge_data_view[current_coordinate].values:
+                beautified_value = beautifyValue(current_coordinate_value)
+                for current_metric in merge_data_view.data_vars:
+                    title = f'{label_for(current_metric)} for diverse {label_for(comparison_variable)} when {label_for(current_coordinate)}={beautified_value}'
+                    for withErrors in [True, False]:
+                        by_time_output_directory = f'{output_directory}/{basedir}/{comparison_variable}'
+                        figname = f'{comparison_variable}_{current_metric}_{current_coordinate}_{beautified_value}{"_err" if withErrors else ""}'
+                        for symbol in r".[]\/@:":
+                            figname = figname.replace(symbol, '_')
+                        specs.append(ChartSpec(render_line_chart, f'{by_time_output_directory}/{figname}.pdf', {
+                            'xlim': xlim,
+                            'title': title,
+                            'xdata': merge_data_view[timeColumnName].values,
+                            'xlabel': unit_for(timeColumnName),
+                            'ylabel': unit_for(current_metric),
+                            'ydata': {
+                                beautifyValue(label): (
+                                    merge_data_view.sel(selector)[current_metric].squeeze().values,
+                                    merge_error_view.sel(selector)[current_metric].squeeze().values if withErrors else 0
+                                )
+                                for label in merge_data_view[comparison_variable].values
+                                for selector in [{comparison_variable: label, current_coordinate: current_coordinate_value}]
+                            },
+                        }))
+    return specs
+
+# Custom charting
+def error_band(ds, errors, variable):
+    """
+    Computes the line and the shaded band of a variable: mean +- standard
+    deviation, or, if errors holds quantiles (as Dataset.quantile), the
+    median (the mean if not among them) within the lowest and the highest
+    quantile.
+
+    Returns
+    -------
+    tuple of ndarray
+        center, lower, and upper values, without singleton dimensions
+    """
+    center = ds[variable]
+    if 'quantile' in errors.dims:
+        quantiles = errors[variable]
+        if 0.5 in quantiles['quantile'].values:
+            center = quantiles.sel(quantile=0.5)
+        lower, upper = quantiles.isel(quantile=0), quantiles.isel(quantile=-1)
+    else:
+        lower, upper = center - errors[variable], center + errors[variable]
+    return tuple(np.squeeze(np.asarray(values)) for values in (center, lower, upper))
+
+def custom_subplot(ax, ds, errors, evaluatingColumn, selected_variance, algorithm, color_value, timeColumnName):
+    import matplotlib.pyplot as plt
+    evaluatingValues = ds.coords[evaluatingColumn].values
+    viridis = plt.colormaps['viridis']
+    for idx, x in enumerate(selected_variance):
+        center, sigmaMinus, sigmaPlus = error_band(ds.sel(variance=x), errors.sel(variance=x), 'error')
+        ax[idx].plot(ds[timeColumnName], center, label=algorithm, color=viridis(color_value), linewidth=2.0)
+        ax[idx].fill_between(ds[timeColumnName], sigmaMinus, sigmaPlus, color=viridis(color_value), alpha=0.2)
+        ax[idx].set_xlabel('Time ($ s $)')
+        ax[idx].set_ylim(0, 1900)
+        #ax[idx].set_ylabel('Squared Distance Error ($ m^2 $)')
+        ax[idx].set_title(f'Relative Drift $ (\\tau) $ = {x}')
+        ax[idx].legend()
+        ax[idx].margins(x=0)
+
+def baseline_subplot(ax, ds, errors, algorithm, color, timeColumnName):
+    for i in range(len(ax)):
+        center, sigmaMinus, sigmaPlus = error_band(ds, errors, 'error')
+        ax[i].plot(ds[timeColumnName], center, label=algorithm, color=color, linestyle='dashed', linewidth=2.0)
+        ax[i].fill_between(ds[timeColumnName], sigmaMinus, sigmaPlus, color=color, alpha=0.2)
+        ax[i].legend()
+        ax[i].margins(x=0)
+
+def create_subtitle(fig: 'plt.Figure', grid: 'SubplotSpec', title: str):
+    "Sign sets of subplots with title"
+    row = fig.add_subplot(grid)
+    # the '\n' is important
+    row.set_title(f'{title}\n', fontweight='semibold')
+    # hide subplot
+    row.set_frame_on(False)
+    row.axis('off')
+
+def render_error_over_time(output, series, baseline, evaluatingColumn, selected_variance, timeColumnName):
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(1, len(selected_variance), figsize=(18, 3), sharey=False, layout="constrained")
+    #grid = plt.GridSpec(len(selected_frequencies), len(selected_variance))
+    axes[0].set_ylabel('Squared Distance Error ($ m^2 $)')
+
+    #fig.suptitle('Errors over time', fontweight='bold')
+    #create_subtitle(fig, grid[idf, ::], f'Agent Frequency = {f}')
+
+    for means, errors, algorithm, color_value in series:
+        custom_subplot(axes, means, errors, evaluatingColumn, selected_variance, algorithm, color_value, timeColumnName)
+    baseline_subplot(axes, *baseline, timeColumnName)
+
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+
+def error_over_time_charts_flattened(means, errors, output_directory, timeColumnName):
+    selected_frequencies = [1.0, 2.0]
+    return ChartSpec(render_error_over_time, f'{output_directory}/error_over_time_flattened.pdf', {
+        'evaluatingColumn': 'variance',
+        'selected_variance': [ 0.0, 0.5, 0.7 ],
+        'timeColumnName': timeColumnName,
+        'series': [
+            (means[experiment].dataset.sel(agentFrequency=f).load(), errors[experiment].dataset.sel(agentFrequency=f).load(), f'{algorithm}@{int(f)}Hz', color)
+            for experiment, algorithm, colors in [("1-exported-data", 'ACLP', [0.1, 0.3]), ("2-exported-data", 'ACLI', [0.7, 0.9])]
+            for f, color in zip(selected_frequencies, colors)
+        ],
+        'baseline': (means["3-exported-data"].dataset.load(), errors["3-exported-data"].dataset.load(), "AMA@1Hz", 'k'),
+    })
+
+def variance_subplot(data, err, ax, values, algorithm, color):
+    import matplotlib.pyplot as plt
+    viridis = plt.colormaps['viridis']
+    for idx, x in enumerate(values):
+        center, sigmaMinus, sigmaPlus = error_band(data.sel(agentFrequency=x), err.sel(agentFrequency=x), 'error')
+        ax[idx].plot(data["variance"], center, label=f'{algorithm}@{int(x)}Hz', color=viridis(color), linewidth=2.0)
+        ax[idx].fill_between(data['variance'], sigmaMinus, sigmaPlus, color=viridis(color), alpha=0.2)
+        ax[idx].set_xlabel('Relative Drift ($ \\tau $)')
+        ax[idx].legend()
+        ax[idx].set_ylim(200, 1400)
+        ax[idx].margins(x=0)
+
+def variance_baseline_subplot(x, err, ax, values, algorithm, color):
+    for i in range(len(ax)):
+        center, sigmaMinus, sigmaPlus = error_band(x, err, 'error')
+        ax[i].axhline(center.item(), label=algorithm, color=color, linestyle='dashed', linewidth=2.0)
+        ax[i].fill_between(values, sigmaMinus, sigmaPlus, color=color, alpha=0.2)
+        ax[i].legend()
+
+def render_error_over_variance(output, series, baseline, selected_frequencies, selected_variance):
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(1, len(selected_frequencies), figsize=(18, 3), sharey=False, layout="constrained")
+    axes[0].set_ylabel('Squared Distance Error ($ m^2 $)')
+    for means, stdevs, algorithm, color in series:
+        variance_subplot(means, stdevs, axes, selected_frequencies, algorithm, color)
+    variance_baseline_subplot(*baseline[:2], axes, selected_variance, *baseline[2:])
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+
+def error_over_variance(means, stdevs, output_directory, timeColumnName):
+    # selected_frequencies = means["1-exported-data"]['agentFrequency']
+    return ChartSpec(render_error_over_variance, f'{output_directory}/error_over_variances.pdf', {
+        'selected_frequencies': [1.0, 2.0, 4.0],
+        'selected_variance': means["1-exported-data"].dataset['variance'].values,
+        'series': [
+            (means[experiment].marginal([timeColumnName]), stdevs[experiment].marginal([timeColumnName]), algorithm, color)
+            for experiment, algorithm, color in [("1-exported-data", 'ACLP', 0.1), ("2-exported-data", 'ACLI', 0.7)]
+        ],
+        'baseline': (means["3-exported-data"].marginal([timeColumnName]), stdevs["3-exported-data"].marginal([timeColumnName]), "AMA@1Hz", 'k'),
+    })
+
+# Label mapping
+class Measure:
+    def __init__(self, description, unit = None):
+        self.__description = description
+        self.__unit = unit
+    def description(self):
+        return self.__description
+    def unit(self):
+        return '' if self.__unit is None else f'({self.__unit})'
+    def derivative(self, new_description = None, new_unit = None):
+        def cleanMathMode(s):
+            return s[1:-1] if s[0] == '$' and s[-1] == '$' else s
+        def deriveString(s):
+            return r'$d ' + cleanMathMode(s) + r'/{dt}$'
+        def deriveUnit(s):
+            return f'${cleanMathMode(s)}' + '/{s}$' if s else None
+        result = Measure(
+            new_description if new_description else deriveString(self.__description),
+            new_unit if new_unit else deriveUnit(self.__unit),
+        )
+        return result
+    def __str__(self):
+        return f'{self.description()} {self.unit()}'
+
+centrality_label = 'H_a(x)'
+def expected(x):
+    return r'\mathbf{E}[' + x + ']'
+def stdev_of(x):
+    return r'\sigma{}[' + x + ']'
+def mse(x):
+    return 'MSE[' + x + ']'
+def cardinality(x):
+    return r'\|' + x + r'\|'
+
+labels = {
+    'nodeCount': Measure(r'$n$', 'nodes'),
+    'harmonicCentrality[Mean]': Measure(f'${expected("H(x)")}$'),
+    'meanNeighbors': Measure(f'${expected(cardinality("N"))}$', 'nodes'),
+    'speed': Measure(r'$\|\vec{v}\|$', r'$m/s$'),
+    'msqer@harmonicCentrality[Max]': Measure(r'$\max{(' + mse(centrality_label) + ')}$'),
+    'msqer@harmonicCentrality[Min]': Measure(r'$\min{(' + mse(centrality_label) + ')}$'),
+    'msqer@harmonicCentrality[Mean]': Measure(f'${expected(mse(centrality_label))}$'),
+    'msqer@harmonicCentrality[StandardDeviation]': Measure(f'${stdev_of(mse(centrality_label))}$'),
+    'org:protelis:tutorial:distanceTo[max]': Measure(r'$m$', 'max distance'),
+    'org:protelis:tutorial:distanceTo[mean]': Measure(r'$m$', 'mean distance'),
+    'org:protelis:tutorial:distanceTo[min]': Measure(r'$m$', ',min distance'),
+}
+def derivativeOrMeasure(variable_name):
+    if variable_name.endswith('dt'):
+        return labels.get(variable_name[:-2], Measure(variable_name)).derivative()
+    return Measure(variable_name)
+def label_for(variable_name):
+    return labels.get(variable_name, derivativeOrMeasure(variable_name)).description()
+def unit_for(variable_name):
+    return str(labels.get(variable_name, derivativeOrMeasure(variable_name)))
+
+def defaultConfiguration():
+    """
+    The default configuration of the processing, which can be overridden by
+    a JSON configuration file and by command line flags of the same name.
+
+    Returns
+    -------
+    dict
+        the configuration, by option name
+    """
+    return {
+        # Where to find Alchemist data files
+        'directory': 'data',
+        # Where to save charts
+        'output_directory': 'charts',
+        # How to name the summary of the processed data (a directory with one array per experiment and variable)
+        'summaryOutput': 'data_summary',
+        # Experiment prefixes: one per experiment (root of the file name)
+        'experiments': ['1-exported-data', '2-exported-data', '3-exported-data'],
+        'floatPrecision': '{: 0.3f}',
+        # Number of time samples
+        'timeSamples': 100,
+        # time management
+        'minTime': 0,
+        'maxTime': 1500,
+        'timeColumnName': 'time',
+        'logarithmicTime': False,
+        # How to resample each run: 'nearest' picks the closest row to each time sample,
+        # 'binned' reduces all the rows into one time bin per sample
+        'resampling': 'nearest',
+        # With binned resampling, the statistic of each bin that is aggregated: 'mean', 'min', 'max', or 'count'
+        'binStatistic': 'mean',
+        # With binned resampling, how many finer bins are cached per file, so that changing timeSamples
+        # coarsens them without reading the files again (exact when a multiple of timeSamples;
+        # at least timeSamples bins are cached, so that no sample is left without fine bins)
+        'fineBins': 300,
+        # One or more variables are considered random and "flattened"
+        'seedVars': ['seed'],
+        # Worker processes used to read and resample the data files
+        'ingestWorkers': os.cpu_count() or 1,
+        # Whether changed files are recognized by content too, not only by size and modification time
+        'hashContent': False,
+        # Whether to fold each run into running means and stdevs as it is read, without keeping the runs in memory
+        'streamingAggregation': False,
+        # Where to read the coordinates of each data file from: 'header' or 'filename'
+        'coordinateSource': 'header',
+        # Worker processes used to render the charts
+        'chartWorkers': os.cpu_count() or 1,
+        # Quantiles over the seeds to compute and store along with means and stdevs, e.g. [0.05, 0.5, 0.95]
+        'quantiles': [],
+        # With streaming aggregation, the capacity of the quantile sketches: higher is more accurate and takes more memory
+        # (quantiles are exact up to this many seeds per combination)
+        'quantileCapacity': 128,
+        # With streaming aggregation, adaptive seed sampling: the seeds of each combination are read in a random order,
+        # minSeeds at a time, until the seedConfidence interval of the mean is within +- seedTolerance times
+        # the mean absolute value of each variable at every time; all the seeds are read if None
+        'seedTolerance': None,
+        'seedConfidence': 0.95,
+        'minSeeds': 10,
+        # Seed of the random order of the seeds of each combination
+        'seedOrder': 0,
+        # Watch mode: seconds between polls of the data directory, and at least between refreshes of the summary and charts
+        'watchInterval': 5,
+        'refreshInterval': 60,
+        # Watch mode: file names (without suffix) of the charts to refresh, all if None
+        'watchCharts': None,
+        # Error bands of the charts: 'stdev' (mean +- standard deviation) or 'quantiles' (median, lowest to highest quantile)
+        'errorBands': 'stdev',
+        # Levels of the time pyramid stored along the summary, each with half the samples of the previous one
+        # (their mean, minimum, and maximum), so that charts and queries can be served at lower resolutions
+        'pyramidLevels': 0,
+        # Samples wanted in the time window by charts and queries: the coarsest level of the time pyramid
+        # with at least as many is used, the stored samples if None
+        'viewSamples': None,
+        # Time window [start, end] of charts and queries (None for an open end), the whole time if None
+        'timeWindow': None,
+        # Whether to time each phase and count processed files, rows, charts, and cache hits, in summaryOutput + '_report.json'
+        'instrument': True,
+        # Whether to also trace the peak memory of each phase (slower)
+        'traceMemory': False,
+        # Phases to run under cProfile (index, ingest, load, aggregate, store, charts), each saved in summaryOutput + '_profile_PHASE.prof';
+        # profiling ingest or aggregate reads the files serially, since worker processes are not profiled
+        'profilePhases': [],
+    }
+
+def loadConfiguration(path=None, **overrides):
+    """
+    Builds a configuration from the defaults, a JSON configuration file, and
+    explicit overrides, in increasing order of priority.
+
+    Parameters
+    ----------
+    path : str
+        path of a JSON file with some of the options, none if None
+    overrides : dict
+        options taking precedence over the file
+
+    Returns
+    -------
+    dict
+        the configuration, by option name
+
+    Raises
+    ------
+    ValueError
+        if an option is unknown
+    """
+    configuration = defaultConfiguration()
+    options = {}
+    if path is not None:
+        import json
+        with open(path, 'r') as file:
+            options.update(json.load(file))
+    options.update(overrides)
+    unknown = options.keys() - configuration.keys()
+    if unknown:
+        raise ValueError(f'Unknown configuration options: {", ".join(sorted(unknown))}')
+    configuration.update(options)
+    return configuration
+
+def configureInstrumentation(configuration):
+    """
+    Replaces the instrumentation of the current run with one configured
+    as requested. When the phases reading the data files are profiled,
+    they are made to read them in this process (ingestWorkers = 1).
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    """
+    global instrumentation
+    if {'ingest', 'aggregate'} & set(configuration['profilePhases']):
+        configuration['ingestWorkers'] = 1
+    instrumentation = Instrumentation(
+        configuration['instrument'],
+        configuration['traceMemory'],
+        configuration['profilePhases'],
+        configuration['summaryOutput'] + '_profile',
+    )
+
+def cacheParametersOf(configuration):
+    parameters = {
+        'timeSamples': configuration['timeSamples'],
+        'minTime': configuration['minTime'],
+        'maxTime': configuration['maxTime'],
+        'logarithmicTime': configuration['logarithmicTime'],
+        'timeColumnName': configuration['timeColumnName'],
+        'streamingAggregation': configuration['streamingAggregation'],
+        'resampling': configuration['resampling'],
+    }
+    if configuration['streamingAggregation']:
+        # The streaming cache only tracks the files, the sketches depend on these; otherwise quantiles are
+        # recomputed exactly from the cached runs (loadSummary checks them)
+        parameters['quantiles'] = list(configuration['quantiles'])
+        parameters['quantileCapacity'] = configuration['quantileCapacity']
+    if configuration['streamingAggregation'] and configuration['seedTolerance'] is not None:
+        # The streaming cache only tracks the files: the summary is recomputed whenever sampling changes
+        parameters.update({ name: configuration[name] for name in ['seedTolerance', 'seedConfidence', 'minSeeds', 'seedOrder'] })
+    if finerBins(configuration):
+        # The cached fine bins can be coarsened to any number of samples
+        del parameters['timeSamples']
+        parameters['fineBins'] = finerBins(configuration)
+    return parameters
+
+def summaryParametersOf(configuration):
+    """
+    Returns
+    -------
+    dict
+        the parameters the summary depends on, but not the cached runs:
+        they are stored with the summary, which is recomputed from the
+        cache when they change
+    """
+    parameters = {'seedVars': list(configuration['seedVars'])}
+    if configuration['resampling'] == 'binned':
+        parameters['binStatistic'] = configuration['binStatistic']
+    return parameters
+
+def storeSummary(configuration, experiment, datasets):
+    """
+    Writes the summary of an experiment in the summary store, along with
+    the levels of its time pyramid, and the parameters it has been
+    computed with (see summaryParametersOf) as attributes of the means.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    experiment : str
+        name of the experiment
+    datasets : dict
+        the datasets to store, by kind, including 'mean'
+    """
+    datasets = withTimePyramid(datasets, configuration['timeColumnName'], configuration['pyramidLevels'])
+    datasets['mean'] = datasets['mean'].assign_attrs(parameters=summaryParametersOf(configuration))
+    writeSummaryStore(configuration['summaryOutput'], experiment, datasets)
+
+def finerBins(configuration):
+    """
+    Returns
+    -------
+    int
+        the number of fine time bins cached per file, never fewer than the
+        time samples, None if runs are cached as they are aggregated
+    """
+    if configuration['resampling'] != 'binned' or configuration['streamingAggregation']:
+        return None
+    return max(configuration['fineBins'], configuration['timeSamples'])
+
+def timeBoundsOf(configuration, paths):
+    """
+    Returns
+    -------
+    tuple of float
+        the configured minimum and maximum time, taken from the data files
+        where not configured (None)
+    """
+    minTime = configuration['minTime']
+    maxTime = configuration['maxTime']
+    if minTime is None or maxTime is None:
+        firstTime, lastTime = timeBounds(paths, configuration['timeColumnName'])
+        minTime = firstTime if minTime is None else minTime
+        maxTime = lastTime if maxTime is None else maxTime
+    return minTime, maxTime
+
+def ingest(configuration):
+    """
+    Brings the coordinate index and the per-file cache up to date, reading
+    and resampling only the data files that are new or changed since the
+    last run.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+
+    Returns
+    -------
+    tuple
+        The CoordinateIndex, the cache (by experiment), and the number of
+        data files that changed, or whose cached bins need to be coarsened
+        differently
+    """
+    directory = configuration['directory']
+    summaryOutput = configuration['summaryOutput']
+    timeColumnName = configuration['timeColumnName']
+    timeSamples = configuration['timeSamples']
+    hashContent = configuration['hashContent']
+    timefun = np.logspace if configuration['logarithmicTime'] else np.linspace
+    cacheParameters = cacheParametersOf(configuration)
+    cache = loadIngestCache(summaryOutput + '_cache', cacheParameters)
+    with instrumentation.phase('index'):
+        index = CoordinateIndex.open(directory, summaryOutput + '_index.json', configuration['coordinateSource'])
+    with instrumentation.phase('ingest'):
+        filesChanged = 0
+        regridded = 0
+        for experiment in configuration['experiments']:
+            # Collect all files for the experiment of interest
+            allfiles = index.files(experiment)
+            signatures = index.signatures(allfiles)
+            if len(allfiles) == 0:
+                filesChanged += len(cache.pop(experiment, {}).get('runs', {}))
+                continue
+            # Compute maximum and minimum time, create the resample
+            minTime, maxTime = timeBoundsOf(configuration, allfiles)
+            edges = None
+            timeline = timefun(minTime, maxTime, timeSamples)
+            if configuration['resampling'] == 'binned':
+                # One bin per sample, the timeline tracks the (possibly finer) bins being cached
+                edges = timefun(minTime, maxTime, timeSamples + 1)
+                fineBins = finerBins(configuration)
+                timeline = timefun(minTime, maxTime, fineBins + 1) if fineBins else edges
+            previous = cache.get(experiment, {})
+            if configuration['streamingAggregation']:
+                # Only track the files, they will be streamed when aggregating
+                runs, stale = refreshManifest(previous, allfiles, timeline, hashContent, signatures)
+                runs.update({ path: {'signature': fileSignature(path, hashContent)} for path in stale })
+                cache[experiment] = {'timeline': timeline, 'runs': { path: runs[path] for path in allfiles }}
+                changed = len(stale)
+            else:
+                # Read and resample the new or changed files only
+                cache[experiment], changed = ingestFilesCached(
+                    previous, allfiles, timeColumnName, timeline, configuration['ingestWorkers'], hashContent, signatures, edges is not None
+                )
+            cache[experiment]['edges'] = edges
+            filesChanged += changed + len(previous.get('runs', {}).keys() - cache[experiment]['runs'].keys())
+            if previous.get('runs') and not np.array_equal(previous.get('edges'), edges):
+                print(f'Coarsening the cached bins of {experiment} to {timeSamples} samples')
+                regridded += len(allfiles) - changed
+        print(f'{filesChanged} data files changed since the last run')
+        saveIngestCache(summaryOutput + '_cache', cacheParameters, cache)
+    return index, cache, filesChanged + regridded
+
+def loadSummary(configuration):
+    """
+    Opens the means, standard deviations, and quantiles from the summary
+    store.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+
+    Returns
+    -------
+    tuple of dict
+        the means, the standard deviations, and the quantiles (empty
+        datasets if none is configured), by experiment
+
+    Raises
+    ------
+    OSError
+        if the summary has not been stored yet
+    ValueError
+        if the stored quantiles are not the configured ones, or the summary
+        has been computed with other parameters
+    KeyError
+        if the configured levels of the time pyramid are not stored
+    """
+    import xarray as xr
+    quantiles = configuration['quantiles']
+    kinds = ['mean', 'std'] + (['quantiles'] if quantiles else [])
+    # The deepest levels are opened (memory mapped) just to check that they are stored
+    levels = [pyramidKind(kind, configuration['pyramidLevels']) for kind in kinds if configuration['pyramidLevels']]
+    with instrumentation.phase('load'):
+        stored = { experiment: openSummaryStore(configuration['summaryOutput'], experiment, kinds + levels) for experiment in configuration['experiments'] }
+    means = { experiment: datasets['mean'] for experiment, datasets in stored.items() }
+    stdevs = { experiment: datasets['std'] for experiment, datasets in stored.items() }
+    estimates = { experiment: datasets.get('quantiles', xr.Dataset()) for experiment, datasets in stored.items() }
+    for experiment, dataset in means.items():
+        if dataset.attrs.get('parameters') != summaryParametersOf(configuration):
+            raise ValueError('The summary has been computed with other parameters')
+    for experiment, dataset in estimates.items():
+        storedQuantiles = dataset['quantile'].values.tolist() if 'quantile' in dataset.coords else []
+        if means[experiment].data_vars and storedQuantiles != list(quantiles):
+            raise ValueError('The stored quantiles are not the configured ones')
+    return means, stdevs, estimates
+
+def aggregate(configuration):
+    """
+    Computes the means, standard deviations, and configured quantiles over
+    the seeds, and stores them along with the per-seed runs. Data is
+    ingested first, and if nothing changed since the last run the stored
+    summary is just loaded.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+
+    Returns
+    -------
+    tuple of dict
+        the means, the standard deviations, and the quantiles, by
+        experiment
+    """
+    import xarray as xr
+    directory = configuration['directory']
+    summaryOutput = configuration['summaryOutput']
+    experiments = configuration['experiments']
+    timeColumnName = configuration['timeColumnName']
+    quantiles = configuration['quantiles']
+    if not os.path.exists(directory):
+        return tuple({ experiment: xr.Dataset() for experiment in experiments } for _ in range(3))
+    # Reprocess only the data files that are new or changed since the last run, otherwise just load
+    if os.path.exists(".skip_data_process"):
+        index = CoordinateIndex.open(directory, summaryOutput + '_index.json', configuration['coordinateSource'])
+        cache = loadIngestCache(summaryOutput + '_cache', cacheParametersOf(configuration))
+        shouldRecompute = False
+    else:
+        index, cache, filesChanged = ingest(configuration)
+        shouldRecompute = filesChanged > 0
+    if not shouldRecompute:
+        try:
+            return loadSummary(configuration)
+        except (OSError, ValueError, KeyError):
+            pass
+    means = {}
+    stdevs = {}
+    estimates = {}
+    for experiment in experiments:
+        runs = cache.get(experiment, {}).get('runs', {})
+        if len(runs) == 0:
+            print("WARNING: No data for experiment " + experiment)
+            dataset = xr.Dataset()
+            dataset.coords[timeColumnName] = range(0, configuration['timeSamples'])
+            means[experiment] = dataset
+            stdevs[experiment] = xr.Dataset()
+            estimates[experiment] = xr.Dataset()
+            storeSummary(configuration, experiment, {'mean': means[experiment], 'std': stdevs[experiment], 'quantiles': estimates[experiment]})
+            continue
+        timeline = cache[experiment]['timeline']
+        edges = cache[experiment].get('edges')
+        if edges is not None:
+            timeline = binCenters(edges)
+        if configuration['streamingAggregation'] and configuration['seedTolerance'] is not None:
+            with instrumentation.phase('aggregate'):
+                cellPaths = {}
+                for path in runs:
+                    key = tuple(sorted((name, value) for name, value in index.coordinates(path).items() if name not in configuration['seedVars']))
+                    cellPaths.setdefault(key, []).append(path)
+                cellPaths = { key: seedOrder(paths, key, configuration['seedOrder']) for key, paths in cellPaths.items() }
+                means[experiment], stdevs[experiment], estimates[experiment], seeds = aggregateAdaptive(
+                    cellPaths, timeColumnName, timeline, configuration['seedVars'], configuration['ingestWorkers'],
+                    edges=edges, statistic=configuration['binStatistic'], quantiles=quantiles, capacity=configuration['quantileCapacity'],
+                    tolerance=configuration['seedTolerance'], confidence=configuration['seedConfidence'], minSeeds=configuration['minSeeds'],
+                )
+            print(
+                f'{experiment}: read {int(seeds["seeds"].sum())} of {int(seeds["available"].sum())} data files, '
+                f'{int(seeds["converged"].sum())} of {seeds["converged"].size} combinations converged, '
+                f'needing up to {int(seeds["seeds"].where(seeds["converged"] == 1).max(skipna=True).fillna(0))} seeds'
+            )
+            with instrumentation.phase('store'):
+                storeSummary(configuration, experiment, {'mean': means[experiment], 'std': stdevs[experiment], 'quantiles': estimates[experiment], 'seeds': seeds})
+            continue
+        if configuration['streamingAggregation']:
+            with instrumentation.phase('aggregate'):
+                means[experiment], stdevs[experiment], estimates[experiment] = aggregateStreaming(
+                    list(runs), timeColumnName, timeline, configuration['seedVars'], configuration['ingestWorkers'],
+                    edges=edges, statistic=configuration['binStatistic'],
+                    quantiles=quantiles, capacity=configuration['quantileCapacity'],
+                )
+            with instrumentation.phase('store'):
+                storeSummary(configuration, experiment, {'mean': means[experiment], 'std': stdevs[experiment], 'quantiles': estimates[experiment]})
+            continue
+        with instrumentation.phase('aggregate'):
+            # From the index, get the independent variables and where each run belongs
+            dimensions = index.dimensions(experiment)
+            positions = index.positions(experiment, dimensions)
+            columns = next(iter(runs.values()))['columns']
+            data = [run['data'] for run in runs.values()]
+            if edges is not None:
+                data = binnedRuns(data, cache[experiment]['timeline'], edges, configuration['binStatistic'], columns.index(timeColumnName))
+            dataset = assembleRuns(
+                data,
+                [positions[file] for file in runs],
+                dimensions,
+                columns,
+                timeColumnName,
+                timeline,
+            )
+            # Fold the dataset along the seed variables, producing the mean and stdev datasets
+            mergingVariables = [seed for seed in configuration['seedVars'] if seed in dataset.coords]
+            means[experiment] = dataset.mean(dim = mergingVariables, skipna=True)
+            stdevs[experiment] = dataset.std(dim = mergingVariables, skipna=True)
+            # All the runs are in memory: quantiles are exact, no need to sketch
+            estimates[experiment] = dataset.quantile(quantiles, dim = mergingVariables, skipna=True) if quantiles else xr.Dataset()
+        # Save the datasets, including the per-seed resampled runs
+        with instrumentation.phase('store'):
+            storeSummary(configuration, experiment, {'mean': means[experiment], 'std': stdevs[experiment], 'quantiles': estimates[experiment], 'runs': dataset})
+    return means, stdevs, estimates
+
+def shardOf(key, shards):
+    """
+    Deterministically assigns a cell to a shard, the same on every node.
+
+    Parameters
+    ----------
+    key : tuple
+        sorted (coordinate name, value) pairs of the cell
+    shards : int
+        number of shards
+
+    Returns
+    -------
+    int
+        the shard of the cell, in [0, shards)
+    """
+    import hashlib
+    return int.from_bytes(hashlib.blake2b(repr(key).encode(), digest_size=8).digest(), 'little') % shards
+
+def partialParameters(configuration):
+    """
+    Returns
+    -------
+    dict
+        the parameters that partial results must share to be merged
+    """
+    parameters = cacheParametersOf(configuration)
+    parameters.pop('streamingAggregation')
+    parameters.update({ name: configuration[name] for name in ['timeSamples', 'seedVars', 'binStatistic', 'quantiles', 'quantileCapacity'] })
+    return parameters
+
+def aggregateShard(configuration, shard, shards):
+    """
+    Folds the runs of one shard in per-cell partial results, and saves them
+    in summaryOutput + '_partials/EXPERIMENT/shard-SHARD-of-SHARDS.pkl'.
+    Files are partitioned by cell (coordinates other than the seeds), so
+    each cell is folded by a single shard, in the same order of a
+    single-node streaming aggregation: once merged, results are identical.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    shard : int
+        the shard to fold, in [0, shards)
+    shards : int
+        number of shards
+
+    Returns
+    -------
+    int
+        the number of files folded
+    """
+    directory = configuration['directory']
+    timeColumnName = configuration['timeColumnName']
+    seedVars = configuration['seedVars']
+    timefun = np.logspace if configuration['logarithmicTime'] else np.linspace
+    # Shards may run at the same time: the index is not persisted, to avoid concurrent writes
+    with instrumentation.phase('index'):
+        index = CoordinateIndex.open(directory, None, configuration['coordinateSource'])
+    folded = 0
+    for experiment in configuration['experiments']:
+        allfiles = index.files(experiment)
+        paths = [
+            path for path in allfiles
+            if shardOf(tuple(sorted((name, value) for name, value in index.coordinates(path).items() if name not in seedVars)), shards) == shard
+        ]
+        timeline, edges = None, None
+        if allfiles:
+            minTime, maxTime = timeBoundsOf(configuration, allfiles)
+            timeline = timefun(minTime, maxTime, configuration['timeSamples'])
+            if configuration['resampling'] == 'binned':
+                edges = timefun(minTime, maxTime, configuration['timeSamples'] + 1)
+                timeline = binCenters(edges)
+        with instrumentation.phase('aggregate'):
+            cells, sketches, names, columns = foldRuns(
+                paths, timeColumnName, timeline, seedVars, configuration['ingestWorkers'],
+                edges=edges, statistic=configuration['binStatistic'],
+                quantiles=configuration['quantiles'], capacity=configuration['quantileCapacity'],
+            )
+        partial = {
+            'shard': shard,
+            'shards': shards,
+            'parameters': partialParameters(configuration),
+            'timeline': timeline,
+            'names': names,
+            'columns': columns,
+            # The files folded, to check that they did not change before merging
+            'signatures': index.signatures(paths),
+            # Plain dictionaries of arrays, readable without this module
+            'cells': { key: vars(moments) for key, moments in cells.items() },
+            'sketches': { key: vars(sketch) for key, sketch in sketches.items() },
+        }
+        target = Path(configuration['summaryOutput'] + '_partials') / experiment / f'shard-{shard}-of-{shards}.pkl'
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so that a merge never reads a partial file
+        with open(target.with_suffix('.tmp'), 'wb') as file:
+            pickle.dump(partial, file, protocol=-1)
+        os.replace(target.with_suffix('.tmp'), target)
+        folded += len(paths)
+    print(f'Shard {shard} of {shards}: folded {folded} data files')
+    return folded
+
+def mergeShards(configuration, shards):
+    """
+    Merges the partial results of all the shards of each experiment, and
+    stores the means, standard deviations, and quantiles in the summary
+    store.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    shards : int
+        number of shards the data files have been partitioned in
+
+    Returns
+    -------
+    tuple of dict
+        the means, the standard deviations, and the quantiles, by
+        experiment
+
+    Raises
+    ------
+    ValueError
+        if shards are missing, have been computed with other parameters, or
+        the data files changed since
+    """
+    import xarray as xr
+    timeColumnName = configuration['timeColumnName']
+    quantiles = configuration['quantiles']
+    parameters = partialParameters(configuration)
+    with instrumentation.phase('index'):
+        index = CoordinateIndex.open(configuration['directory'], None, configuration['coordinateSource'])
+    means, stdevs, estimates = {}, {}, {}
+    for experiment in configuration['experiments']:
+        paths = [Path(configuration['summaryOutput'] + '_partials') / experiment / f'shard-{shard}-of-{shards}.pkl' for shard in range(shards)]
+        missing = [path.name for path in paths if not path.exists()]
+        if missing:
+            raise ValueError(f'Missing shards of {experiment}: {", ".join(missing)}')
+        partials = []
+        for path in paths:
+            with open(path, 'rb') as file:
+                partials.append(pickle.load(file))
+        if any(partial['parameters'] != parameters for partial in partials):
+            raise ValueError(f'The shards of {experiment} have been computed with other parameters')
+        folded = { path: signature for partial in partials for path, signature in partial['signatures'].items() }
+        if folded != index.signatures(index.files(experiment)):
+            raise ValueError(f'The data files of {experiment} changed since the shards have been computed')
+        cells, sketches, names, columns = {}, {}, {}, []
+        timeline = next((partial['timeline'] for partial in partials if partial['timeline'] is not None), None)
+        with instrumentation.phase('aggregate'):
+            for partial in partials:
+                names.update(dict.fromkeys(partial['names']))
+                columns = columns or partial['columns']
+                for key, state in partial['cells'].items():
+                    moments = RunningMoments(state['count'].shape)
+                    vars(moments).update(state)
+                    if key in cells:
+                        cells[key].merge(moments)
+                    else:
+                        cells[key] = moments
+                for key, state in partial['sketches'].items():
+                    sketch = QuantileSketch(state['shape'], state['capacity'])
+                    vars(sketch).update(state)
+                    if key in sketches:
+                        sketches[key].merge(sketch)
+                    else:
+                        sketches[key] = sketch
+            if not cells:
+                print("WARNING: No data for experiment " + experiment)
+                means[experiment] = xr.Dataset()
+                means[experiment].coords[timeColumnName] = range(0, configuration['timeSamples'])
+                stdevs[experiment], estimates[experiment] = xr.Dataset(), xr.Dataset()
+            else:
+                means[experiment], stdevs[experiment] = momentsToDatasets(cells, list(names), columns, timeColumnName, timeline)
+                estimates[experiment] = sketchesToDataset(sketches, quantiles, list(names), columns, timeColumnName, timeline)
+        with instrumentation.phase('store'):
+            storeSummary(configuration, experiment, {'mean': means[experiment], 'std': stdevs[experiment], 'quantiles': estimates[experiment]})
+        print(f'Merged {len(partials)} shards of {experiment} ({len(folded)} data files)')
+    return means, stdevs, estimates
+
+def aggregateSharded(configuration, shards, workers=None):
+    """
+    Runs all the shards as local processes, then merges them: the same
+    steps of a multi-node aggregation, with the summary directory shared.
+    The partial results of previous runs are removed first.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    shards : int
+        number of shards
+    workers : int
+        number of shards running at once, all of them if None
+
+    Returns
+    -------
+    tuple of dict
+        the means, the standard deviations, and the quantiles, by
+        experiment
+    """
+    import concurrent.futures
+    import shutil
+    for experiment in configuration['experiments']:
+        shutil.rmtree(Path(configuration['summaryOutput'] + '_partials') / experiment, ignore_errors=True)
+    # Each shard reads its own files: no nested worker pools
+    local = dict(configuration, ingestWorkers=1)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers or shards) as executor:
+        list(executor.map(aggregateShard, [local] * shards, range(shards), [shards] * shards))
+    return mergeShards(configuration, shards)
+
+def plot(configuration, means=None, stdevs=None, quantiles=None, chart=None):
+    """
+    Renders the charts that are not up to date.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    means : dict
+        the means by experiment, loaded from the summary store if None
+    stdevs : dict
+        the standard deviations by experiment, loaded from the summary store
+        if None
+    quantiles : dict
+        the quantiles by experiment, loaded from the summary store if None
+    chart : str
+        the file name (without suffix) of the only chart to render, all
+        charts if None
+    """
+    if means is None or stdevs is None or quantiles is None:
+        means, stdevs, quantiles = loadSummary(configuration)
+    with instrumentation.phase('charts'):
+        specs = [spec for spec in chartSpecs(configuration, means, stdevs, quantiles) if chart is None or Path(spec.output).stem == chart]
+        renderCharts(specs, configuration['chartWorkers'], f'{configuration["output_directory"]}/.charts.json')
+
+def chartSpecs(configuration, means, stdevs, quantiles):
+    """
+    Describes all the charts to plot.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    means : dict
+        the means by experiment
+    stdevs : dict
+        the standard deviations by experiment
+    quantiles : dict
+        the quantiles by experiment
+
+    Returns
+    -------
+    list of ChartSpec
+        the charts
+    """
+    # The error bands are either mean +- stdev, or the median and the extreme quantiles
+    errorKinds = {}
+    for experiment, dataset in means.items():
+        errorKinds[experiment] = 'quantiles' if configuration['errorBands'] == 'quantiles' else 'std'
+        if errorKinds[experiment] == 'quantiles' and dataset.data_vars and 'quantile' not in quantiles[experiment].dims:
+            print(f'WARNING: No quantiles for experiment {experiment} (see the quantiles option), drawing stdev bands')
+            errorKinds[experiment] = 'std'
+    errors = { experiment: (quantiles if kind == 'quantiles' else stdevs)[experiment] for experiment, kind in errorKinds.items() }
+    # Every chart draws its views from the same lattices, so that each reduction is computed once
+    means = { experiment: MarginalLattice(chartLevel(configuration, experiment, 'mean', dataset)) for experiment, dataset in means.items() }
+    errors = { experiment: MarginalLattice(chartLevel(configuration, experiment, errorKinds[experiment], dataset)) for experiment, dataset in errors.items() }
+    output_directory = configuration['output_directory']
+    timeColumnName = configuration['timeColumnName']
+    specs = []
+    for experiment in configuration['experiments']:
+        current_experiment_means = means[experiment]
+        current_experiment_errors = errors[experiment]
+        #specs += generate_all_charts(current_experiment_means, current_experiment_errors, output_directory, timeColumnName, label_for, unit_for, (configuration['minTime'], configuration['maxTime']), basedir = f'{experiment}/all')
+
+    # Create plots
+
+    specs.append(error_over_time_charts_flattened(means, errors, output_directory, timeColumnName))
+    specs.append(error_over_variance(means, errors, output_directory, timeColumnName))
+    return specs
+
+def chartLevel(configuration, experiment, kind, dataset):
+    """
+    Picks the dataset to chart: the coarsest level of the time pyramid in
+    the summary store with viewSamples in timeWindow (the means of the
+    merged samples), restricted to the window.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    experiment : str
+        name of the experiment
+    kind : str
+        the kind of dataset
+    dataset : xarray.Dataset
+        the dataset at full resolution
+
+    Returns
+    -------
+    xarray.Dataset
+        the dataset to chart
+    """
+    import json
+    timeColumnName = configuration['timeColumnName']
+    window = configuration['timeWindow']
+    if not dataset.data_vars or timeColumnName not in dataset.dims:
+        return dataset
+    if configuration['viewSamples'] is not None and configuration['pyramidLevels']:
+        source = Path(configuration['summaryOutput']) / experiment
+        with open(source / 'metadata.json', 'r') as file:
+            level = summaryLevel(json.load(file), kind, timeColumnName, configuration['viewSamples'], window)
+        if level != kind:
+            dataset = openSummaryStore(configuration['summaryOutput'], experiment, [level])[level].sel(envelope='mean', drop=True)
+    if window is not None:
+        dataset = dataset.sel({timeColumnName: slice(*window)})
+    return dataset
+
+def querySummary(directory, experiment, kind='mean', variable=None, selection=None, reduce=(), samples=None, window=None, timeColumnName='time'):
+    """
+    Reads a slice of the summary store using only NumPy, so that it is
+    fast enough for interactive use. With samples, the slice is read from
+    the coarsest level of the time pyramid that has as many in the window,
+    with the mean, minimum, and maximum of the merged samples along the
+    'envelope' dimension.
+
+    Parameters
+    ----------
+    directory : str
+        root directory of the store
+    experiment : str
+        name of the experiment
+    kind : str
+        the kind of dataset: 'mean', 'std', 'quantiles', 'runs', or 'seeds'
+    variable : str
+        the variable to read, the first one if None
+    selection : dict
+        the selected value (or list of values) of some coordinates
+    reduce : list of str
+        coordinates to average over, skipping NaN
+    samples : int
+        the samples wanted in the time window, all the stored ones if None
+    window : list
+        the time window [start, end] (None for an open end), the whole time
+        if None
+    timeColumnName : str
+        name of the time dimension
+
+    Returns
+    -------
+    tuple
+        The remaining dimension names, their coordinate values, and the
+        ndarray with the selected values
+
+    Raises
+    ------
+    KeyError
+        if the variable, a coordinate, or a selected value does not exist
+    """
+    import json
+    source = Path(directory) / experiment
+    with open(source / 'metadata.json', 'r') as file:
+        metadata = json.load(file)
+    description = metadata[summaryLevel(metadata, kind, timeColumnName, samples, window)]
+    variable = variable if variable is not None else next(iter(description['variables']))
+    values = np.load(source / description['variables'][variable]['file'], mmap_mode='r')
+    selection = windowSelection(description['coords'], timeColumnName, window, selection)
+    return selectSummary(values, description['variables'][variable]['dims'], description['coords'], selection, reduce)
+
+def windowSelection(coords, timeColumnName, window=None, selection=None):
+    """
+    Returns
+    -------
+    dict
+        the selection, restricted to the times within a window (see
+        timesInWindow), unless the times are selected already
+    """
+    selection = dict(selection or {})
+    if window is not None and timeColumnName in coords and timeColumnName not in selection:
+        selection[timeColumnName] = timesInWindow(coords[timeColumnName], window)
+    return selection
+
+def selectSummary(values, dims, coords, selection=None, reduce=()):
+    """
+    Selects and averages a slice of an array of the summary store.
+
+    Parameters
+    ----------
+    values : ndarray
+        the array
+    dims : list of str
+        the dimension names of the array
+    coords : dict
+        the coordinate values, by dimension name
+    selection : dict
+        the selected value (or list of values) of some coordinates
+    reduce : list of str
+        coordinates to average over, skipping NaN
+
+    Returns
+    -------
+    tuple
+        The remaining dimension names, their coordinate values, and the
+        ndarray with the selected values
+
+    Raises
+    ------
+    KeyError
+        if a coordinate does not exist
+    ValueError
+        if a selected value does not exist
+    """
+    coords = { name: coords[name] for name in dims }
+    indexer = []
+    for name in dims:
+        wanted = (selection or {}).get(name)
+        if wanted is None:
+            indexer.append(slice(None))
+            continue
+        positions = [coords[name].index(value) for value in (wanted if isinstance(wanted, list) else [wanted])]
+        coords[name] = [coords[name][position] for position in positions]
+        indexer.append(positions[0] if not isinstance(wanted, list) else positions)
+    # One list at a time, so that lists select along their own dimension
+    result = values[tuple(position if not isinstance(position, list) else slice(None) for position in indexer)]
+    remaining = [name for name, position in zip(dims, indexer) if not isinstance(position, int)]
+    for axis, position in enumerate(position for position in indexer if not isinstance(position, int)):
+        if isinstance(position, list):
+            result = np.take(result, position, axis=axis)
+    for name in reduce:
+        axis = remaining.index(name)
+        result = np.nanmean(result, axis=axis)
+        remaining.pop(axis)
+    return remaining, { name: coords[name] for name in remaining }, np.asarray(result)
+
+def timesInWindow(times, window=None):
+    """
+    Returns
+    -------
+    list
+        the times within a window [start, end] (None for an open end), all
+        of them if the window is None
+    """
+    start, end = window if window is not None else (None, None)
+    return [time for time in times if (start is None or time >= start) and (end is None or time <= end)]
+
+def summaryLevel(metadata, kind, timeColumnName, samples=None, window=None):
+    """
+    Picks the coarsest level of the time pyramid of a kind of dataset that
+    still has the wanted samples within a time window.
+
+    Parameters
+    ----------
+    metadata : dict
+        the metadata of an experiment in the summary store, by kind
+    kind : str
+        the kind of dataset
+    timeColumnName : str
+        name of the time dimension
+    samples : int
+        the samples wanted, the full resolution if None
+    window : list
+        the time window [start, end], None for an open end or the whole
+        time
+
+    Returns
+    -------
+    str
+        the kind of dataset of the level, kind itself for full resolution
+    """
+    chosen = kind
+    level = 1
+    while samples is not None and pyramidKind(kind, level) in metadata:
+        times = metadata[pyramidKind(kind, level)]['coords'].get(timeColumnName, [])
+        if len(timesInWindow(times, window)) < samples:
+            break
+        chosen = pyramidKind(kind, level)
+        level += 1
+    return chosen
+
+class SummaryServer:
+    """
+    Long-lived server of the summary store over localhost HTTP. The arrays
+    are read once and kept in memory, and the results of queries and chart
+    descriptions are kept in an LRU cache. Everything is read again when
+    the store is rewritten (e.g., by the aggregate command).
+
+    Requests, answered in JSON (NaN as in Python's json module):
+    - GET /query?experiment=E&statistic=mean&variable=V&select=name=value&reduce=name&samples=S&window=START&window=END
+      as querySummary, with select and reduce repeatable, and the samples
+      and the window defaulting to viewSamples and timeWindow;
+    - GET /chart?name=N renders the chart whose file name (without suffix)
+      is N, or all of them without a name, if not up to date;
+    - GET /status lists the experiments and the cache usage.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration
+    capacity : int
+        maximum number of cached results
+    """
+    def __init__(self, configuration, capacity=256):
+        self.configuration = configuration
+        self.capacity = capacity
+        self.results = collections.OrderedDict()
+        self.arrays = {}
+        self.version = None
+
+    def storeVersion(self):
+        """
+        Returns
+        -------
+        tuple
+            the modification time of the metadata of each experiment, which
+            changes whenever the store is rewritten
+        """
+        versions = []
+        for experiment in self.configuration['experiments']:
+            path = Path(self.configuration['summaryOutput']) / experiment / 'metadata.json'
+            versions.append(path.stat().st_mtime_ns if path.exists() else None)
+        return tuple(versions)
+
+    def cached(self, key, compute):
+        """
+        Returns the cached result for a key, computing it on a miss.
+
+        Parameters
+        ----------
+        key : tuple
+            the key of the result
+        compute : callable
+            computes the result, without arguments
+
+        Returns
+        -------
+        object
+            the result
+        """
+        version = self.storeVersion()
+        if version != self.version:
+            self.results.clear()
+            self.arrays.clear()
+            self.version = version
+        if key in self.results:
+            self.results.move_to_end(key)
+            instrumentation.count('queryHits')
+            return self.results[key]
+        instrumentation.count('queryMisses')
+        result = compute()
+        self.results[key] = result
+        if len(self.results) > self.capacity:
+            self.results.popitem(last=False)
+        return result
+
+    def stored(self, experiment, kind):
+        """
+        Returns
+        -------
+        tuple
+            the metadata of a kind of dataset of an experiment, and its
+            arrays by variable, read in memory once
+        """
+        if (experiment, kind) not in self.arrays:
+            description = self.metadata(experiment)[kind]
+            source = Path(self.configuration['summaryOutput']) / experiment
+            arrays = { name: np.load(source / variable['file']) for name, variable in description['variables'].items() }
+            self.arrays[(experiment, kind)] = (description, arrays)
+        return self.arrays[(experiment, kind)]
+
+    def metadata(self, experiment):
+        """
+        Returns
+        -------
+        dict
+            the metadata of an experiment in the store, by kind
+        """
+        import json
+        with open(Path(self.configuration['summaryOutput']) / experiment / 'metadata.json', 'r') as file:
+            return json.load(file)
+
+    def query(self, experiment, kind='mean', variable=None, selection=None, reduce=(), samples=None, window=None):
+        """
+        Selects and averages a slice of the summary, as querySummary.
+        """
+        selection = selection or {}
+        key = ('query', experiment, kind, variable, tuple(sorted((name, str(value)) for name, value in selection.items())), tuple(reduce), samples, str(window))
+        def compute():
+            timeColumnName = self.configuration['timeColumnName']
+            level = summaryLevel(self.metadata(experiment), kind, timeColumnName, samples, window)
+            description, arrays = self.stored(experiment, level)
+            name = variable if variable is not None else next(iter(description['variables']))
+            levelSelection = windowSelection(description['coords'], timeColumnName, window, selection)
+            return selectSummary(arrays[name], description['variables'][name]['dims'], description['coords'], levelSelection, reduce)
+        return self.cached(key, compute)
+
+    def chart(self, name=None):
+        """
+        Renders a chart, if not up to date.
+
+        Parameters
+        ----------
+        name : str
+            the file name of the chart, without suffix, all charts if None
+
+        Returns
+        -------
+        list of str
+            the paths of the charts
+
+        Raises
+        ------
+        KeyError
+            if there is no such chart
+        """
+        def compute():
+            summary = self.cached(('summary',), lambda: tuple({ experiment: dataset.load() for experiment, dataset in datasets.items() } for datasets in loadSummary(self.configuration)))
+            return { Path(spec.output).stem: spec for spec in chartSpecs(self.configuration, *summary) }
+        specs = self.cached(('charts',), compute)
+        specs = list(specs.values()) if name is None else [specs[name]]
+        renderCharts(specs, 1, f'{self.configuration["output_directory"]}/.charts.json')
+        return [spec.output for spec in specs]
+
+    def answer(self, path, parameters):
+        """
+        Answers a request.
+
+        Parameters
+        ----------
+        path : str
+            the path of the request: /query, /chart, or /status
+        parameters : dict
+            the query string parameters, as lists of values by name
+
+        Returns
+        -------
+        dict
+            the answer
+
+        Raises
+        ------
+        KeyError
+            if the path is unknown
+        ValueError
+            if a required parameter is missing
+        """
+        first = lambda name, default=None: parameters.get(name, [default])[0]
+        if path == '/query':
+            if first('experiment') is None:
+                raise ValueError('Missing parameter: experiment')
+            selection = dict(item.split('=', 1) for item in parameters.get('select', []))
+            window = [parseOption(value) for value in parameters['window']] if 'window' in parameters else self.configuration['timeWindow']
+            dims, coords, values = self.query(
+                first('experiment'),
+                first('statistic', 'mean'),
+                first('variable'),
+                { name: parseOption(value) for name, value in selection.items() },
+                parameters.get('reduce', []),
+                parseOption(first('samples')) if 'samples' in parameters else self.configuration['viewSamples'],
+                window,
+            )
+            return {'dims': dims, 'coords': coords, 'values': values.tolist()}
+        if path == '/chart':
+            return {'outputs': self.chart(first('name'))}
+        if path == '/status':
+            return {'experiments': self.configuration['experiments'], 'cached': len(self.results), 'capacity': self.capacity}
+        raise KeyError(path)
+
+    def serve(self, host='127.0.0.1', port=8765):
+        """
+        Answers requests until interrupted. Requests are served one at a
+        time, which keeps the caches and the chart backend consistent.
+
+        Parameters
+        ----------
+        host : str
+            the address to listen on, local only by default
+        port : int
+            the port to listen on
+        """
+        import http.server
+        import json
+        import urllib.parse
+        server = self
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                request = urllib.parse.urlsplit(self.path)
+                try:
+                    status, answer = 200, server.answer(request.path, urllib.parse.parse_qs(request.query))
+                except (KeyError, ValueError, OSError) as e:
+                    status, answer = 400, {'error': f'{type(e).__name__}: {e}'}
+                body = json.dumps(answer).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, format, *args):
+                pass
+        with http.server.HTTPServer((host, port), Handler) as httpd:
+            print(f'Serving {self.configuration["summaryOutput"]} on http://{host}:{httpd.server_port}')
+            try:
+                httpd.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+def requestServer(url, path, **parameters):
+    """
+    Sends a request to a SummaryServer.
+
+    Parameters
+    ----------
+    url : str
+        the address of the server, such as 'http://127.0.0.1:8765'
+    path : str
+        the request: 'query', 'chart', or 'status'
+    parameters : dict
+        the parameters of the request, lists for repeated ones
+
+    Returns
+    -------
+    dict
+        the answer
+
+    Raises
+    ------
+    ValueError
+        if the server could not answer
+    """
+    import json
+    import urllib.error
+    import urllib.parse
+    import urllib.request
+    query = urllib.parse.urlencode({ name: value for name, value in parameters.items() if value is not None }, doseq=True)
+    try:
+        with urllib.request.urlopen(f'{url.rstrip("/")}/{path}?{query}') as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise ValueError(json.loads(e.read()).get('error', str(e)))
+
+class ExportWatcher:
+    """
+    Follows the Alchemist exports while the simulations write them, folding
+    the new data in running means and standard deviations over the seeds.
+
+    Each file is read from the byte offset where the previous read stopped,
+    up to its last complete line, so that the cost of a poll grows with the
+    new data only. A time sample (or bin) of a run is folded in as soon as
+    it cannot change anymore: once a row at or after its time (after its
+    bin) has been read, or once the export is complete. Hence, once all the
+    exports are complete, the summary is the same as aggregating them from
+    scratch (up to rounding, and to equidistant rows resolving to the
+    earliest one). Compressed exports are decompressed again when they
+    grow, and the quantiles are not computed.
+
+    Parameters
+    ----------
+    configuration : dict
+        the processing configuration, with fixed minTime and maxTime
+    """
+    def __init__(self, configuration):
+        if configuration['minTime'] is None or configuration['maxTime'] is None:
+            raise ValueError('Watching the exports requires a fixed minTime and maxTime')
+        self.configuration = configuration
+        timefun = np.logspace if configuration['logarithmicTime'] else np.linspace
+        timeSamples = configuration['timeSamples']
+        self.edges = None
+        self.timeline = timefun(configuration['minTime'], configuration['maxTime'], timeSamples)
+        if configuration['resampling'] == 'binned':
+            self.edges = timefun(configuration['minTime'], configuration['maxTime'], timeSamples + 1)
+            self.timeline = binCenters(self.edges)
+        self.files = {}
+        self.cells = { experiment: {} for experiment in configuration['experiments'] }
+        self.names = { experiment: {} for experiment in configuration['experiments'] }
+        self.columns = { experiment: [] for experiment in configuration['experiments'] }
+
+    def experimentOf(self, name):
+        """
+        Returns
+        -------
+        str or None
+            the experiment of an export, by file name
+        """
+        if not exportSuffix(name):
+            return None
+        return next((experiment for experiment in self.configuration['experiments'] if name.startswith(experiment + '_')), None)
+
+    def poll(self):
+        """
+        Reads the data appended to the exports since the last poll, and
+        folds it in the running aggregates.
+
+        Returns
+        -------
+        int
+            the number of rows read
+        """
+        directory = self.configuration['directory']
+        rows = 0
+        for entry in os.scandir(directory):
+            experiment = self.experimentOf(entry.name)
+            if experiment is None:
+                continue
+            state = self.files.get(entry.path)
+            size = entry.stat().st_size
+            if state is not None and (state['complete'] or state['size'] == size):
+                continue
+            if state is not None and size < state['size']:
+                raise RuntimeError(f'{entry.path} has been truncated, the watch must be restarted')
+            if state is None:
+                state = self.files[entry.path] = {'experiment': experiment, 'size': 0, 'offset': 0, 'columns': None, 'complete': False}
+            rows += self.read(entry.path, state, size)
+        instrumentation.count('rowsParsed', rows)
+        return rows
+
+    def read(self, path, state, size):
+        """
+        Reads the complete lines appended to an export.
+
+        Returns
+        -------
+        int
+            the number of rows read
+        """
+        try:
+            if exportCodecs.get(exportSuffix(path)) is None:
+                with open(path, 'rb') as file:
+                    file.seek(state['offset'])
+                    content = file.read(size - state['offset'])
+            else:
+                with openExport(path, 'rb') as file:
+                    content = file.read()[state['offset']:]
+        except (EOFError, OSError):
+            # A compressed stream still being written
+            return 0
+        state['size'] = size
+        position = 0
+        if state['columns'] is None:
+            variables, columns, position = parseHeader(content)
+            if position >= len(content):
+                # The header is not complete yet
+                return 0
+            state.update(variables=variables, columns=columns, column=columns.index(self.configuration['timeColumnName']), last=None, next=0, bins=None)
+            coordinates = { name: value for name, value in variables.items() if name not in self.configuration['seedVars'] }
+            state['key'] = tuple(sorted(coordinates.items()))
+            self.names[state['experiment']].update(dict.fromkeys(coordinates))
+            self.columns[state['experiment']] = self.columns[state['experiment']] or columns
+            state['offset'] += position
+            content = content[position:]
+        # The data ends at the footer, or at the last complete line while still being written
+        footer = content.find(b'\n#')
+        complete = footer >= 0 or content[:1] == b'#'
+        end = 0 if content[:1] == b'#' else footer + 1 if footer >= 0 else content.rfind(b'\n') + 1
+        if end == 0 and not complete:
+            return 0
+        body = content[:end]
+        state['offset'] += end
+        width = len(state['columns'])
+        values = np.fromstring(body, dtype=np.float64, sep=' ') if body.strip() else np.empty(0)
+        data = values[:values.size // width * width].reshape(-1, width)
+        self.fold(state, data, complete)
+        state['complete'] = complete
+        return len(data)
+
+    def fold(self, state, data, complete):
+        """
+        Folds the time samples of a run that became final in the moments of
+        its cell.
+
+        Parameters
+        ----------
+        state : dict
+            the reading state of the export
+        data : ndarray
+            the new rows
+        complete : bool
+            whether the export is complete
+        """
+        column = state['column']
+        lastTime = data[-1, column] if len(data) else (state['last'][column] if state['last'] is not None else None)
+        if lastTime is None:
+            return
+        start = state['next']
+        if self.edges is None:
+            rows = data if state['last'] is None else np.concatenate([state['last'][None], data])
+            times = rows[:, column]
+            samples = self.timeline[start:]
+            after = np.searchsorted(times, samples, side='left')
+            # Rows are sorted by time: a sample is final once a row at or after it has been read
+            final = len(samples) if complete else int(np.sum(after < len(times)))
+            after = np.minimum(after[:final], len(times) - 1)
+            before = np.maximum(after - 1, 0)
+            closer = np.abs(samples[:final] - times[before]) <= np.abs(times[after] - samples[:final])
+            values = rows[np.where(closer, before, after)]
+            values[:, column] = samples[:final]
+            state['last'] = rows[-1]
+        else:
+            bins = timeBins(column, self.edges, data)
+            if state['bins'] is None:
+                state['bins'] = bins
+            else:
+                previous = state['bins']
+                state['bins'] = np.stack([previous[0] + bins[0], previous[1] + bins[1], np.fmin(previous[2], bins[2]), np.fmax(previous[3], bins[3])])
+            state['last'] = data[-1] if len(data) else state['last']
+            # A bin is final once a row after it has been read (the last bin is closed on the right)
+            final = len(self.timeline) if complete else int(np.searchsorted(self.edges[1:], lastTime, side='right'))
+            if not complete and final == len(self.timeline) and lastTime <= self.edges[-1]:
+                final -= 1
+            final -= start
+            values = binStatistic(state['bins'][:, start:start + final], self.configuration['binStatistic'], column, self.timeline[start:start + final])
+        if final <= 0:
+            return
+        update = np.full((len(self.timeline), len(state['columns'])), np.nan)
+        update[start:start + final] = values
+        cells = self.cells[state['experiment']]
+        if state['key'] not in cells:
+            cells[state['key']] = RunningMoments(update.shape)
+        cells[state['key']].add(update)
+        state['next'] = start + final
+        instrumentation.count('samplesResampled', final)
+
+    def summary(self):
+        """
+        Returns
+        -------
+        tuple of dict
+            the means, the standard deviations, and the (empty) quantiles
+            folded so far, by experiment
+        """
+        import xarray as xr
+        means, stdevs = {}, {}
+        for experiment, cells in self.cells.items():
+            if cells:
+                means[experiment], stdevs[experiment] = momentsToDatasets(
+                    cells, list(self.names[experiment]), self.columns[experiment], self.configuration['timeColumnName'], self.timeline
+                )
+            else:
+                means[experiment], stdevs[experiment] = xr.Dataset(), xr.Dataset()
+        return means, stdevs, { experiment: xr.Dataset() for experiment in self.cells }
+
+    def refresh(self, charts=None):
+        """
+        Stores the summary folded so far, and renders the charts.
+
+        Parameters
+        ----------
+        charts : list of str
+            the file names (without suffix) of the charts to render, all of
+            them if None
+        """
+        means, stdevs, quantiles = self.summary()
+        with instrumentation.phase('store'):
+            for experiment in means:
+                storeSummary(self.configuration, experiment, {'mean': means[experiment], 'std': stdevs[experiment]})
+        with instrumentation.phase('charts'):
+            try:
+                specs = chartSpecs(self.configuration, means, stdevs, quantiles)
+            except (KeyError, ValueError, IndexError) as e:
+                print(f'Charts not plotted yet, some data is missing: {e!r}')
+                return
+            specs = [spec for spec in specs if charts is None or Path(spec.output).stem in charts]
+            renderCharts(specs, 1, f'{self.configuration["output_directory"]}/.charts.json')
+
+    def run(self, once=False):
+        """
+        Polls the exports every watchInterval seconds, refreshing the
+        summary and the watchCharts at most every refreshInterval seconds
+        when new data arrived, until interrupted.
+
+        Parameters
+        ----------
+        once : bool
+            whether to poll and refresh just once
+        """
+        lastRefresh = float('-inf')
+        pending = 0
+        try:
+            while True:
+                with instrumentation.phase('ingest'):
+                    pending += self.poll()
+                complete = sum(state['complete'] for state in self.files.values())
+                if pending and (once or time.monotonic() - lastRefresh >= self.configuration['refreshInterval']):
+                    print(f'{pending} new rows, {complete} of {len(self.files)} exports complete')
+                    self.refresh(self.configuration['watchCharts'])
+                    lastRefresh = time.monotonic()
+                    pending = 0
+                if once:
+                    return
+                time.sleep(self.configuration['watchInterval'])
+        except KeyboardInterrupt:
+            if pending:
+                self.refresh(self.configuration['watchCharts'])
+
+def parseOption(text):
+    """
+    Parses a command line value as JSON (numbers, booleans, null, lists),
+    falling back to the plain string.
+    """
+    import json
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def main(arguments=None):
+    """
+    Command line entry point: python process.py [ingest|aggregate|plot|query|serve|watch|shard|merge] [options].
+    Without a command, data is aggregated and charts are plotted.
+
+    Parameters
+    ----------
+    arguments : list of str
+        the command line arguments, sys.argv if None
+    """
+    import argparse
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument('--config', default=argparse.SUPPRESS, help='JSON file with configuration options')
+    for name, default in defaultConfiguration().items():
+        options.add_argument(f'--{name}', type=parseOption, default=argparse.SUPPRESS, help=f'(default: {default!r})')
+    parser = argparse.ArgumentParser(description='Processes Alchemist exports and plots charts', parents=[options])
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('ingest', parents=[options], help='read and resample new or changed data files')
+    commands.add_parser('aggregate', parents=[options], help='ingest, then compute and store means and stdevs')
+    plotCommand = commands.add_parser('plot', parents=[options], help='render charts from the stored summary')
+    plotCommand.add_argument('--chart', help='render only the chart with this file name (without suffix)')
+    query = commands.add_parser('query', parents=[options], help='print a slice of the stored summary')
+    query.add_argument('experiment', help='experiment prefix')
+    query.add_argument('--statistic', default='mean', help="'mean', 'std', 'quantiles', 'runs', or 'seeds' (with seedTolerance)")
+    query.add_argument('--variable', help='variable to print, the first one by default')
+    query.add_argument('--select', action='append', default=[], metavar='NAME=VALUE', help='select a coordinate value, repeatable')
+    query.add_argument('--reduce', action='append', default=[], metavar='NAME', help='average over a coordinate, repeatable')
+    for client in (plotCommand, query):
+        client.add_argument('--server', help='send the request to a running server, such as http://127.0.0.1:8765')
+    shard = commands.add_parser('shard', parents=[options], help='fold one shard of the data files in partial results, or all shards locally and merge them')
+    shard.add_argument('--count', type=int, required=True, help='number of shards')
+    shard.add_argument('--index', type=int, help='the shard to fold, all of them as local processes (then merged) if missing')
+    merge = commands.add_parser('merge', parents=[options], help='merge the partial results of all shards in the summary')
+    merge.add_argument('--count', type=int, required=True, help='number of shards')
+    watch = commands.add_parser('watch', parents=[options], help='follow the exports while they are written, refreshing the summary and charts')
+    watch.add_argument('--once', action='store_true', help='poll and refresh just once')
+    serve = commands.add_parser('serve', parents=[options], help='keep the stored summary in memory, answering queries over localhost HTTP')
+    serve.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    serve.add_argument('--port', type=int, default=8765, help='port to listen on')
+    serve.add_argument('--capacity', type=int, default=256, help='maximum number of cached results')
+    args = vars(parser.parse_args(arguments))
+    command = args.pop('command')
+    commandArguments = ['experiment', 'statistic', 'variable', 'select', 'reduce', 'chart', 'server', 'host', 'port', 'capacity', 'once', 'count', 'index']
+    queryArguments = { name: args.pop(name) for name in commandArguments if name in args }
+    configuration = loadConfiguration(args.pop('config', None), **args)
+    np.set_printoptions(formatter={'float': configuration['floatPrecision'].format})
+    if command == 'query':
+        selection = dict(item.split('=', 1) for item in queryArguments['select'])
+        try:
+            if queryArguments['server']:
+                answer = requestServer(
+                    queryArguments['server'], 'query',
+                    experiment=queryArguments['experiment'],
+                    statistic=queryArguments['statistic'],
+                    variable=queryArguments['variable'],
+                    select=queryArguments['select'],
+                    reduce=queryArguments['reduce'],
+                    samples=configuration['viewSamples'],
+                    window=configuration['timeWindow'],
+                )
+                dims, coords, values = answer['dims'], answer['coords'], np.array(answer['values'], dtype=float)
+            else:
+                dims, coords, values = querySummary(
+                    configuration['summaryOutput'],
+                    queryArguments['experiment'],
+                    queryArguments['statistic'],
+                    queryArguments['variable'],
+                    { name: parseOption(value) for name, value in selection.items() },
+                    queryArguments['reduce'],
+                    configuration['viewSamples'],
+                    configuration['timeWindow'],
+                    configuration['timeColumnName'],
+                )
+        except (KeyError, ValueError) as e:
+            parser.error(f'not in the summary: {e}')
+        print(' '.join(dims + [queryArguments['variable'] or queryArguments['statistic']]))
+        for position in np.ndindex(values.shape):
+            row = [str(beautifyValue(coords[name][i])) for name, i in zip(dims, position)]
+            print(' '.join(row + [configuration['floatPrecision'].format(values[position]).strip()]))
+        return
+    if command == 'plot' and queryArguments['server']:
+        for output in requestServer(queryArguments['server'], 'chart', name=queryArguments['chart'])['outputs']:
+            print(output)
+        return
+    configureInstrumentation(configuration)
+    if command == 'ingest':
+        ingest(configuration)
+    elif command == 'aggregate':
+        aggregate(configuration)
+    elif command == 'plot':
+        plot(configuration, chart=queryArguments['chart'])
+    elif command == 'shard' and queryArguments['index'] is not None:
+        aggregateShard(configuration, queryArguments['index'], queryArguments['count'])
+    elif command == 'shard':
+        aggregateSharded(configuration, queryArguments['count'])
+    elif command == 'merge':
+        mergeShards(configuration, queryArguments['count'])
+    elif command == 'watch':
+        ExportWatcher(configuration).run(queryArguments['once'])
+    elif command == 'serve':
+        SummaryServer(configuration, queryArguments['capacity']).serve(queryArguments['host'], queryArguments['port'])
+    else:
+        plot(configuration, *aggregate(configuration))
+    instrumentation.save(configuration['summaryOutput'] + '_report.json')
+
+if __name__ == '__main__':
+    main()